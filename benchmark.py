@@ -0,0 +1,338 @@
+# Micro-benchmarks for the matching pipeline. Run with:
+#   python benchmark.py [name ...]
+
+import random
+import sys
+import time
+
+import config
+
+
+def _timeit(fn, repeat: int = 5) -> float:
+    """Best-of-`repeat` wall time in seconds."""
+    best = float("inf")
+    for _ in range(repeat):
+        start = time.perf_counter()
+        fn()
+        best = min(best, time.perf_counter() - start)
+    return best
+
+
+def _synthetic_phrases(n: int, seed: int = 0) -> list:
+    rng = random.Random(seed)
+    forms = [form for forms in config.SKILL_SYNONYMS.values() for form in forms]
+    filler = ["years", "of", "experience", "with", "strong", "knowledge", "in", "good", "team"]
+    phrases = []
+    for _ in range(n):
+        words = rng.sample(filler, 3) + rng.sample(forms, 2)
+        rng.shuffle(words)
+        phrases.append(" ".join(words))
+    return phrases
+
+
+def bench_skill_normalization():
+    """Skill index throughput and integer-set matching vs. substring scans."""
+    import skills
+    from scoring import ScoringEngine
+
+    phrases = _synthetic_phrases(20000)
+    n_tokens = sum(len(skills.tokenize(p)) for p in phrases)
+
+    t = _timeit(lambda: [skills.SKILL_INDEX.extract(p) for p in phrases], repeat=3)
+    print(f"extract:          {len(phrases) / t:,.0f} phrases/s, {n_tokens / t:,.0f} tokens/s")
+    t = _timeit(lambda: [skills.SKILL_INDEX.canonical_tokens(p) for p in phrases], repeat=3)
+    print(f"canonical_tokens: {len(phrases) / t:,.0f} phrases/s")
+
+    def substring_score(required, candidate_keywords):
+        lowered = [s.lower() for s in candidate_keywords]
+        return sum(any(k in r.lower() for k in lowered) for r in required)
+
+    required = phrases[:10]
+    candidates = [random.Random(i).sample(phrases, 30) for i in range(500)]
+    scorer = ScoringEngine()
+    t_old = _timeit(lambda: [substring_score(required, c) for c in candidates])
+    t_new = _timeit(lambda: [scorer._score_skills(required, c) for c in candidates])
+    print(f"score 500 candidates: substring {t_old * 1000:.1f} ms, skill index {t_new * 1000:.1f} ms")
+
+
+def bench_embedding_cache():
+    """Cold (batched encode) vs. warm (LRU) vs. disk-only query embedding."""
+    import tempfile
+    from sentence_transformers import SentenceTransformer
+    from embeddings import EmbeddingCache
+
+    model = SentenceTransformer(config.EMBEDDING_MODEL)
+    queries = _synthetic_phrases(64, seed=1)
+
+    t_loop = _timeit(lambda: [model.encode([q]) for q in queries], repeat=1)
+    print(f"one-by-one encode:   {t_loop * 1000:.1f} ms")
+
+    with tempfile.TemporaryDirectory() as cache_dir:
+        cache = EmbeddingCache(lambda: model, config.EMBEDDING_MODEL, cache_dir=cache_dir)
+        t_cold = _timeit(lambda: cache.encode(queries), repeat=1)
+        t_warm = _timeit(lambda: cache.encode(queries))
+        fresh = EmbeddingCache(lambda: model, config.EMBEDDING_MODEL, cache_dir=cache_dir)
+        t_disk = _timeit(lambda: fresh.encode(queries), repeat=1)
+    print(f"batched cold encode: {t_cold * 1000:.1f} ms")
+    print(f"LRU hit:             {t_warm * 1000:.2f} ms")
+    print(f"disk hit:            {t_disk * 1000:.2f} ms")
+
+
+def bench_multifield_recall(n_resumes: int = 500, n_jobs: int = 20, k: int = 10):
+    """
+    Recall@K on synthetic data: the current single-field path (`index()` over
+    summaries + `search()` with the job summary, a BM25/Chroma union of up to
+    2K ids) vs. multi-field retrieval as the pipeline runs it.
+    """
+    from retrieval import HybridRetriever, SUMMARY_FIELD, job_field_queries, job_field_weights
+
+    rng = random.Random(2)
+    skill_names = sorted(config.SKILL_SYNONYMS)
+    titles = ["Backend Engineer", "Data Scientist", "Frontend Developer", "DevOps Engineer", "ML Engineer"]
+
+    documents, ids, skill_sets = [], [], []
+    for i in range(n_resumes):
+        skills = rng.sample(skill_names, 6)
+        title = rng.choice(titles)
+        # The summary mimics an LLM summary: it keeps the role and a couple of
+        # skills (under any synonym) but drops the rest.
+        kept = [rng.choice(config.SKILL_SYNONYMS[s]) for s in rng.sample(skills, 2)]
+        documents.append({
+            "skills": ", ".join(config.SKILL_SYNONYMS[s][0] for s in skills),
+            "experience": f"{title}: built and maintained production systems using {config.SKILL_SYNONYMS[skills[0]][0]}.",
+            SUMMARY_FIELD: f"Experienced {title.lower()} working with {' and '.join(kept)}; "
+                           f"delivers reliable software and collaborates across teams.",
+        })
+        ids.append(f"resume_{i}")
+        skill_sets.append(set(skills))
+
+    baseline = HybridRetriever()
+    t = _timeit(lambda: baseline.index([doc[SUMMARY_FIELD] for doc in documents], ids), repeat=1)
+    print(f"index (summary only): {n_resumes} resumes in {t:.2f} s")
+    retriever = HybridRetriever()
+    retriever.sbert_model = baseline.sbert_model
+    t = _timeit(lambda: retriever.index_fields(documents, ids), repeat=1)
+    print(f"index_fields: {n_resumes} resumes x {len(documents[0])} fields in {t:.2f} s")
+
+    recalls = {"single-field union": [], "multi-field": []}
+    returned = {"single-field union": [], "multi-field": []}
+    for _ in range(n_jobs):
+        must_have = rng.sample(skill_names, 2)
+        relevant = {ids[i] for i, s in enumerate(skill_sets) if set(must_have) <= s}
+        if not relevant:
+            continue
+        title = rng.choice(titles)
+        job = config.ParsedJob(
+            job_title=title,
+            required_years_experience=3,
+            skills=config.SkillCluster(must_have=[config.SKILL_SYNONYMS[s][-1] for s in must_have],
+                                       important=[], nice_to_have=[], implicit_skills=[]),
+            responsibilities_summary=f"We are hiring a {title.lower()} with {' and '.join(must_have)} experience.",
+        )
+        results = {
+            "single-field union": baseline.search(job.responsibilities_summary, top_k=k),
+            "multi-field": retriever.search_fields(job_field_queries(job), top_k=k,
+                                                   weights=job_field_weights(job)),
+        }
+        for name, found in results.items():
+            recalls[name].append(len(relevant & set(found)) / min(len(relevant), k))
+            returned[name].append(len(found))
+
+    for name, values in recalls.items():
+        print(f"recall@{k} {name}: {sum(values) / max(len(values), 1):.3f} over {len(values)} jobs "
+              f"({sum(returned[name]) / max(len(returned[name]), 1):.1f} ids returned on average)")
+
+
+class _StubLLM:
+    """Stands in for llm_interface: fixed latency, random failures, optional crash."""
+
+    def __init__(self, latency: float = 0.02, fail_rate: float = 0.1, crash_after: int = None, seed: int = 0):
+        import threading
+        self.latency = latency
+        self.fail_rate = fail_rate
+        self.crash_after = crash_after
+        self.rng = random.Random(seed)
+        self.calls = 0
+        self._lock = threading.Lock()
+
+    def parse_resume(self, resume_text: str) -> config.ParsedResume:
+        with self._lock:
+            self.calls += 1
+            calls = self.calls
+            fail = self.rng.random() < self.fail_rate
+        if self.crash_after is not None and calls > self.crash_after:
+            raise KeyboardInterrupt("simulated crash")
+        time.sleep(self.latency)
+        if fail:
+            raise ConnectionError("simulated LLM outage")
+        return config.ParsedResume(
+            name=resume_text.split("\n", 1)[0], total_years_experience=3, skills=["python"],
+            experience=[], full_text_summary=resume_text
+        )
+
+
+def bench_job_queue(n_resumes: int = 200):
+    """Checkpointed ingestion throughput by worker count, and recovery after a crash."""
+    import os
+    import tempfile
+    from job_queue import JobQueue
+    from matching_system import CandidateMatchingSystem
+
+    with tempfile.TemporaryDirectory() as tmp:
+        files = []
+        for i in range(n_resumes):
+            path = os.path.join(tmp, f"resume_{i}.txt")
+            with open(path, "w", encoding="utf-8") as f:
+                f.write(f"Candidate {i}\nPython developer.")
+            files.append(path)
+
+        system = CandidateMatchingSystem(llm=_StubLLM())
+        for workers in (1, 8):
+            system.queue = JobQueue(os.path.join(tmp, f"throughput_{workers}.sqlite3"))
+            t = _timeit(lambda: system.process_resumes(files, workers=workers), repeat=1)
+            print(f"{workers} worker(s): {n_resumes / t:,.1f} resumes/s, "
+                  f"{len(system.candidates_db)} parsed")
+
+        queue_path = os.path.join(tmp, "recovery.sqlite3")
+        system.llm = _StubLLM(crash_after=n_resumes // 2)
+        system.queue = JobQueue(queue_path)
+        try:
+            system.process_resumes(files, workers=8)
+        except KeyboardInterrupt:
+            print(f"crashed mid-run: parse {system.queue.counts(system.run_id, 'parse')}")
+
+        system.llm = _StubLLM()
+        # Same lease settings as production: interrupted claims were released on the way out.
+        system.queue = JobQueue(queue_path)
+        t = _timeit(lambda: system.process_resumes(files, workers=8), repeat=1)
+        print(f"recovery: {t:.2f} s, {system.llm.calls} LLM calls to finish, "
+              f"{len(system.candidates_db)} parsed")
+
+
+EMBEDDING_DIM = 384  # all-MiniLM-L6-v2 (config.EMBEDDING_MODEL)
+
+
+class _HashEncoder:
+    """Cheap deterministic stand-in for SentenceTransformer.encode, at the real model's dimension."""
+
+    def encode(self, texts, convert_to_numpy=True, **kwargs):
+        import numpy as np
+        return np.stack([np.random.default_rng(abs(hash(t)) % 2**32).random(EMBEDDING_DIM, dtype=np.float32)
+                         for t in texts])
+
+
+def _streaming_peak_rss(n_resumes: int, chunk_size: int) -> tuple:
+    """
+    Runs in a fresh process: streams `n_resumes` files, then runs one
+    multi-field search. Returns (baseline MB, peak MB, ingest s, search s).
+    """
+    import contextlib
+    import os
+    import resource
+    import tempfile
+    from embeddings import EmbeddingCache
+    from job_queue import JobQueue
+    from matching_system import CandidateMatchingSystem
+
+    with tempfile.TemporaryDirectory() as tmp:
+        resume_dir = os.path.join(tmp, "resumes")
+        os.makedirs(resume_dir)
+        for i in range(n_resumes):
+            with open(os.path.join(resume_dir, f"resume_{i}.txt"), "w", encoding="utf-8") as f:
+                f.write(f"Candidate {i}\nPython developer with Django and AWS.")
+
+        system = CandidateMatchingSystem(
+            llm=_StubLLM(latency=0, fail_rate=0),
+            queue=JobQueue(os.path.join(tmp, "queue.sqlite3")),
+            persist_dir=os.path.join(tmp, "index")
+        )
+        system.retriever.sbert_model = _HashEncoder()
+        # No disk cache: stub vectors must never land in the real model's cache.
+        system.retriever.query_cache = EmbeddingCache(lambda: system.retriever.sbert_model, "hash-stub", cache_dir=None)
+
+        baseline = resource.getrusage(resource.RUSAGE_SELF).ru_maxrss / 1024
+        # devnull, not StringIO: buffering the per-file log lines grows with the pool.
+        with open(os.devnull, "w") as devnull, contextlib.redirect_stdout(devnull):
+            t_ingest = _timeit(lambda: system.ingest_directory(resume_dir, chunk_size=chunk_size), repeat=1)
+            t_search = _timeit(lambda: system.retriever.search_fields(
+                {"skills": "python, django", "experience": "Backend Engineer", "summary": "python developer"},
+                top_k=config.TOP_K_RETRIEVAL
+            ), repeat=1)
+        peak = resource.getrusage(resource.RUSAGE_SELF).ru_maxrss / 1024
+    return baseline, peak, t_ingest, t_search
+
+
+def bench_streaming_memory(sizes=(10_000, 100_000), chunk_size: int = config.INGEST_CHUNK_SIZE):
+    """
+    Peak RSS of streaming ingestion plus one search as the pool grows. Each
+    size runs in its own process so the peaks do not mask each other. The
+    LLM and encoder are stubbed (vectors keep the real 384 dims) so the
+    numbers reflect the pipeline's own memory, not the model's. Peak RSS
+    should stay flat; pass larger sizes (e.g., 1_000_000) to check further.
+    """
+    import multiprocessing
+
+    ctx = multiprocessing.get_context("spawn")
+    for n in sizes:
+        with ctx.Pool(1) as pool:
+            baseline, peak, t_ingest, t_search = pool.apply(_streaming_peak_rss, (n, chunk_size))
+        print(f"{n:>9,} resumes: peak RSS {peak:,.0f} MB (+{peak - baseline:,.0f} MB over startup), "
+              f"ingest {t_ingest:,.0f} s, search {t_search:.2f} s")
+
+
+IMPORT_TIME_BUDGET_SECONDS = 1.0
+HEAVY_MODULES = ("torch", "sentence_transformers", "chromadb", "openai", "pdfplumber", "docx", "rank_bm25")
+
+
+def import_probe(module: str = "matching_system") -> tuple:
+    """
+    Imports `module` in a fresh interpreter and returns (seconds, eager), where
+    `eager` lists the HEAVY_MODULES that import pulled in.
+    """
+    import os
+    import subprocess
+
+    probe = (
+        "import sys, time; t = time.perf_counter(); import {module}; "
+        "print(time.perf_counter() - t); print(','.join(m for m in {heavy!r} if m in sys.modules))"
+    ).format(module=module, heavy=HEAVY_MODULES)
+    cwd = os.path.dirname(os.path.abspath(__file__))
+
+    out = subprocess.run([sys.executable, "-c", probe], cwd=cwd, capture_output=True,
+                         text=True, check=True).stdout.splitlines()
+    return float(out[-2]), [m for m in out[-1].split(",") if m]
+
+
+def bench_import_time(module: str = "matching_system", repeat: int = 5):
+    """
+    Cold `import matching_system` time in a fresh interpreter. Fails (non-zero
+    exit) if it exceeds IMPORT_TIME_BUDGET_SECONDS or if any heavy backend is
+    imported eagerly, so it can gate CI.
+    """
+    timings, eager = [], []
+    for _ in range(repeat):
+        seconds, eager = import_probe(module)
+        timings.append(seconds)
+    best = min(timings)
+    print(f"import {module}: best {best * 1000:.0f} ms, worst {max(timings) * 1000:.0f} ms "
+          f"(budget {IMPORT_TIME_BUDGET_SECONDS * 1000:.0f} ms)")
+
+    if eager:
+        raise SystemExit(f"FAIL: importing {module} eagerly loaded {', '.join(eager)}")
+    if best > IMPORT_TIME_BUDGET_SECONDS:
+        raise SystemExit(f"FAIL: import {module} took {best:.2f} s")
+
+
+BENCHMARKS = {
+    "skills": bench_skill_normalization,
+    "embedding_cache": bench_embedding_cache,
+    "multifield_recall": bench_multifield_recall,
+    "job_queue": bench_job_queue,
+    "streaming_memory": bench_streaming_memory,
+    "import_time": bench_import_time,
+}
+
+if __name__ == "__main__":
+    for name in sys.argv[1:] or list(BENCHMARKS):
+        print(f"--- {name} ---")
+        BENCHMARKS[name]()
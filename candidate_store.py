@@ -0,0 +1,82 @@
+import sqlite3
+from contextlib import contextmanager
+from typing import Dict, Iterable, Iterator, List, Optional, Tuple
+import config
+
+SCHEMA = """
+CREATE TABLE IF NOT EXISTS candidates (
+    candidate_id TEXT PRIMARY KEY,
+    resume_json  TEXT NOT NULL
+);
+"""
+
+
+class CandidateStore:
+    """
+    SQLite-backed stand-in for the in-memory `candidates_db` dict. Parsed
+    resumes live on disk and are only deserialized when read, so memory does
+    not grow with the size of the resume pool.
+    """
+
+    def __init__(self, db_path: str):
+        self.db_path = db_path
+        with self._connect() as conn:
+            conn.execute("PRAGMA journal_mode=WAL")
+            conn.executescript(SCHEMA)
+
+    @contextmanager
+    def _connect(self):
+        conn = sqlite3.connect(self.db_path, timeout=30, isolation_level=None)
+        try:
+            yield conn
+        finally:
+            conn.close()
+
+    def put_many(self, resumes: Dict[str, config.ParsedResume]):
+        with self._connect() as conn:
+            conn.execute("BEGIN")
+            conn.executemany(
+                "INSERT OR REPLACE INTO candidates (candidate_id, resume_json) VALUES (?, ?)",
+                [(cid, resume.model_dump_json()) for cid, resume in resumes.items()]
+            )
+            conn.execute("COMMIT")
+
+    def get(self, candidate_id: str, default=None) -> Optional[config.ParsedResume]:
+        with self._connect() as conn:
+            row = conn.execute(
+                "SELECT resume_json FROM candidates WHERE candidate_id = ?", (candidate_id,)
+            ).fetchone()
+        return config.ParsedResume.model_validate_json(row[0]) if row else default
+
+    def missing(self, candidate_ids: List[str]) -> List[str]:
+        """Returns the IDs from `candidate_ids` that are not stored yet."""
+        if not candidate_ids:
+            return []
+        placeholders = ", ".join("?" * len(candidate_ids))
+        with self._connect() as conn:
+            stored = {row[0] for row in conn.execute(
+                f"SELECT candidate_id FROM candidates WHERE candidate_id IN ({placeholders})",
+                candidate_ids
+            )}
+        return [cid for cid in candidate_ids if cid not in stored]
+
+    def items(self) -> Iterator[Tuple[str, config.ParsedResume]]:
+        """Streams every stored candidate without loading the table at once."""
+        with self._connect() as conn:
+            for cid, resume_json in conn.execute("SELECT candidate_id, resume_json FROM candidates"):
+                yield cid, config.ParsedResume.model_validate_json(resume_json)
+
+    def keys(self) -> Iterator[str]:
+        with self._connect() as conn:
+            for (cid,) in conn.execute("SELECT candidate_id FROM candidates"):
+                yield cid
+
+    def values(self) -> Iterable[config.ParsedResume]:
+        return (resume for _, resume in self.items())
+
+    def __contains__(self, candidate_id: str) -> bool:
+        return not self.missing([candidate_id])
+
+    def __len__(self) -> int:
+        with self._connect() as conn:
+            return conn.execute("SELECT COUNT(*) FROM candidates").fetchone()[0]
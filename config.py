@@ -8,6 +8,35 @@ EMBEDDING_MODEL = "all-MiniLM-L6-v2"
 
 TOP_K_RETRIEVAL = 10 
 
+# Per-field weights for multi-field retrieval, fused with Reciprocal Rank Fusion.
+RETRIEVAL_FIELD_WEIGHTS = {
+    "skills": 0.5,
+    "experience": 0.3,
+    "summary": 0.2
+}
+RRF_K = 60
+# Each must-have adds this fraction to the skills-field weight, for up to MUST_HAVE_BOOST_CAP must-haves.
+MUST_HAVE_FIELD_BOOST = 0.2
+MUST_HAVE_BOOST_CAP = 5
+
+# Checkpointed pipeline runs (job_queue.py).
+JOB_QUEUE_PATH = "pipeline_queue.sqlite3"
+JOB_QUEUE_WORKERS = 4
+# Live workers renew their lease every third of this; a dead worker's items are reclaimed after it.
+JOB_LEASE_SECONDS = 30
+JOB_MAX_ATTEMPTS = 3
+
+# Streaming ingestion: resumes per chunk, and how many vectors the on-disk dense
+# index scores at a time (16384 x 384 float32 = 24 MB per block).
+INGEST_CHUNK_SIZE = 256
+DENSE_SEARCH_BLOCK_ROWS = 16384
+
+# Query embeddings: in-memory LRU size, on-disk location (None disables disk)
+# and how many entries the disk store keeps (~1.5 KB each for 384-dim vectors).
+EMBEDDING_CACHE_SIZE = 1024
+EMBEDDING_CACHE_DIR = ".embedding_cache"
+EMBEDDING_CACHE_DISK_ENTRIES = 100_000
+
 SCORING_WEIGHTS = {
     "must_have_skills": 0.35,
     "important_skills": 0.25,
@@ -17,6 +46,77 @@ SCORING_WEIGHTS = {
     "domain_match": 0.05
 }
 
+# Canonical skill id -> surface forms. Compiled into a lookup index by skills.py
+# and shared by the ScoringEngine and the BM25 tokenizer.
+SKILL_SYNONYMS = {
+    "python": ["python", "python3"],
+    "javascript": ["javascript", "js", "ecmascript", "es6"],
+    "typescript": ["typescript"],
+    "java": ["java"],
+    "c": ["c", "c language"],
+    "cpp": ["c++", "cpp"],
+    "csharp": ["c#", "csharp", "c sharp"],
+    "dotnet": [".net", "dotnet", "asp.net"],
+    "go": ["go", "golang"],
+    "rust": ["rust"],
+    "ruby": ["ruby"],
+    "rails": ["rails", "ruby on rails", "ror"],
+    "php": ["php"],
+    "scala": ["scala"],
+    "kotlin": ["kotlin"],
+    "swift": ["swift"],
+    "r": ["r language", "r programming"],
+    "sql": ["sql"],
+    "postgresql": ["postgresql", "postgres", "psql"],
+    "mysql": ["mysql"],
+    "mongodb": ["mongodb", "mongo"],
+    "redis": ["redis"],
+    "django": ["django"],
+    "flask": ["flask"],
+    "fastapi": ["fastapi"],
+    "react": ["react", "react.js", "reactjs"],
+    "angular": ["angular", "angularjs", "angular.js"],
+    "vue": ["vue", "vue.js", "vuejs"],
+    "nodejs": ["node", "node.js", "nodejs"],
+    "rest_api": ["rest api", "rest apis", "restful", "restful api", "restful apis", "restful services"],
+    "graphql": ["graphql"],
+    "aws": ["aws", "amazon web services"],
+    "aws_s3": ["s3", "amazon s3"],
+    "aws_ec2": ["ec2", "amazon ec2"],
+    "gcp": ["gcp", "google cloud", "google cloud platform"],
+    "azure": ["azure", "microsoft azure"],
+    "docker": ["docker"],
+    "kubernetes": ["kubernetes", "k8s"],
+    "terraform": ["terraform"],
+    "ci_cd": ["ci/cd", "cicd", "ci cd", "continuous integration", "continuous delivery", "continuous deployment"],
+    "git": ["git", "github", "gitlab"],
+    "linux": ["linux", "unix"],
+    "machine_learning": ["machine learning", "ml"],
+    "deep_learning": ["deep learning"],
+    "nlp": ["nlp", "natural language processing"],
+    "pytorch": ["pytorch", "torch"],
+    "tensorflow": ["tensorflow"],
+    "pandas": ["pandas"],
+    "spark": ["spark", "apache spark", "pyspark"],
+    "kafka": ["kafka", "apache kafka"],
+    "microservices": ["microservices", "micro-services", "microservice architecture"],
+    "frontend": ["frontend", "front-end", "front end"],
+    "backend": ["backend", "back-end", "back end", "server-side", "server side"],
+    "cs_degree": ["b.s. in computer science", "bs in computer science", "bsc computer science",
+                  "bachelor's in computer science", "bachelor of science in computer science"],
+}
+
+
+# Bare forms that are also everyday words ("go the extra mile", "C-suite").
+# They only count as skills when the text around them says so: standing alone
+# as a list item, next to another skill ("C/C++", "Go and Rust"), next to a
+# context word ("Go developer"), or after "in"/"with"/"using". A form glued to
+# another word by a hyphen ("Go-to-market") never counts.
+AMBIGUOUS_SKILL_FORMS = ["go", "c", "node", "swift", "spark"]
+SKILL_CONTEXT_WORDS = ["language", "languages", "lang", "programming", "programmer", "programmers",
+                       "developer", "developers", "engineer", "engineers", "code", "experience"]
+SKILL_CONTEXT_PREFIXES = ["in", "with", "using"]
+
 
 class SkillCluster(BaseModel):
     must_have: List[str]
@@ -110,4 +210,3 @@ The report must be a JSON object with 5 keys:
 'overall_fit_score' (int), 'confidence' (string), 'strengths' (string),
 'gaps' (string), and 'notes' (string).
 """
-print("File 'config.py' created.")
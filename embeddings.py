@@ -0,0 +1,139 @@
+import hashlib
+import os
+import tempfile
+from collections import OrderedDict
+from functools import cached_property
+from typing import Any, Callable, List, Optional
+import numpy as np
+import config
+
+# Read once at import; os.umask can only be queried by setting it.
+_UMASK = os.umask(0)
+os.umask(_UMASK)
+
+
+class EmbeddingCache:
+    """
+    Two-level cache for sentence embeddings: an in-memory LRU in front of an
+    on-disk store of .npy files. Entries are keyed by a hash of the model name
+    and the text, so switching models never returns stale vectors. The disk
+    store keeps at most `max_disk_entries` files, dropping the least recently
+    used; several processes can share it. `load_model` is only called on the
+    first cache miss, so fully cached queries never load the encoder.
+    """
+
+    def __init__(self, load_model: Callable[[], Any], model_name: str,
+                 max_size: int = config.EMBEDDING_CACHE_SIZE,
+                 cache_dir: Optional[str] = config.EMBEDDING_CACHE_DIR,
+                 max_disk_entries: int = config.EMBEDDING_CACHE_DISK_ENTRIES):
+        self.load_model = load_model
+        self.model_name = model_name
+        self.max_size = max_size
+        self.cache_dir = cache_dir
+        self.max_disk_entries = max_disk_entries
+        self._lru = OrderedDict()
+        self.hits = 0
+        self.misses = 0
+        if cache_dir:
+            os.makedirs(cache_dir, exist_ok=True)
+
+    @cached_property
+    def model(self):
+        return self.load_model()
+
+    def _key(self, text: str) -> str:
+        return hashlib.sha256(f"{self.model_name}\0{text}".encode("utf-8")).hexdigest()
+
+    def _path(self, key: str) -> str:
+        return os.path.join(self.cache_dir, f"{key}.npy")
+
+    def _remember(self, key: str, vector: np.ndarray):
+        self._lru[key] = vector
+        self._lru.move_to_end(key)
+        while len(self._lru) > self.max_size:
+            self._lru.popitem(last=False)
+
+    def _lookup(self, key: str) -> Optional[np.ndarray]:
+        if key in self._lru:
+            self._lru.move_to_end(key)
+            return self._lru[key]
+        if self.cache_dir and os.path.exists(self._path(key)):
+            try:
+                vector = np.load(self._path(key))
+                # Marks the entry as recently used for disk eviction.
+                os.utime(self._path(key))
+            except FileNotFoundError:
+                return None  # evicted by another process in the meantime
+            except Exception as e:
+                print(f"Warning: Discarding unreadable cache entry {key}: {e}")
+                return None
+            self._remember(key, vector)
+            return vector
+        return None
+
+    def _store(self, key: str, vector: np.ndarray):
+        self._remember(key, vector)
+        if self.cache_dir:
+            # A unique temp file per writer, so workers storing the same key
+            # never rename each other's half-written file.
+            fd, tmp_path = tempfile.mkstemp(dir=self.cache_dir, suffix=".tmp")
+            try:
+                # mkstemp creates 0600 files; use the usual umask-based mode instead.
+                os.chmod(tmp_path, 0o666 & ~_UMASK)
+                with os.fdopen(fd, "wb") as f:
+                    np.save(f, vector)
+                os.replace(tmp_path, self._path(key))
+            except BaseException:
+                os.unlink(tmp_path)
+                raise
+
+    def _evict_disk(self):
+        """Deletes the least recently used .npy files beyond `max_disk_entries`."""
+        entries = []
+        for entry in os.scandir(self.cache_dir):
+            if entry.name.endswith(".npy"):
+                try:
+                    entries.append((entry.stat().st_mtime, entry.path))
+                except FileNotFoundError:
+                    continue
+        if len(entries) <= self.max_disk_entries:
+            return
+        entries.sort()
+        for _, path in entries[:len(entries) - self.max_disk_entries]:
+            try:
+                os.unlink(path)
+            except FileNotFoundError:
+                pass
+
+    def encode(self, texts: List[str]) -> np.ndarray:
+        """
+        Returns one embedding per text. All cache misses (de-duplicated) are
+        encoded together in a single batched forward pass.
+        """
+        if not texts:
+            return np.empty((0, 0), dtype=np.float32)
+
+        keys = [self._key(t) for t in texts]
+        vectors = {}
+        to_encode = {}
+        for key, text in zip(keys, texts):
+            if key in vectors or key in to_encode:
+                continue
+            vector = self._lookup(key)
+            if vector is None:
+                to_encode[key] = text
+            else:
+                vectors[key] = vector
+
+        self.hits += len(vectors)
+        self.misses += len(to_encode)
+
+        if to_encode:
+            encoded = self.model.encode(list(to_encode.values()), convert_to_numpy=True)
+            for key, vector in zip(to_encode, encoded):
+                vectors[key] = vector
+                self._store(key, vector)
+            if self.cache_dir:
+                self._evict_disk()
+
+        return np.stack([vectors[key] for key in keys])
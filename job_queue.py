@@ -0,0 +1,281 @@
+import sqlite3
+import threading
+import time
+import traceback
+from concurrent.futures import ThreadPoolExecutor
+from contextlib import contextmanager
+from typing import Callable, Dict, Iterable, List, Optional, Tuple
+import config
+
+SCHEMA = """
+CREATE TABLE IF NOT EXISTS tasks (
+    run_id     TEXT NOT NULL,
+    stage      TEXT NOT NULL,
+    item_id    TEXT NOT NULL,
+    status     TEXT NOT NULL DEFAULT 'pending',
+    payload    TEXT,
+    result     TEXT,
+    error      TEXT,
+    attempts   INTEGER NOT NULL DEFAULT 0,
+    worker     TEXT,
+    claimed_at REAL,
+    PRIMARY KEY (run_id, stage, item_id)
+);
+-- Index entries end in the implicit rowid, so per-status lookups come back in
+-- insertion order without a sort.
+CREATE INDEX IF NOT EXISTS tasks_status ON tasks (run_id, stage, status);
+"""
+
+# Appended to a task's WHERE clause when a worker is given: the worker still
+# holds the item, or it was released and nobody has claimed it since.
+_OWNED_CLAUSE = " AND ((status = 'running' AND worker = ?) OR status = 'pending')"
+
+
+def _owned(worker: Optional[str]) -> Tuple[str, list]:
+    return ("", []) if worker is None else (_OWNED_CLAUSE, [worker])
+
+
+class JobQueue:
+    """
+    SQLite-backed work queue for pipeline stages. Each (run, stage, item) row
+    records its own completion, so a crashed run resumes from the last
+    checkpoint and several workers (threads or processes sharing the file)
+    can drain a stage in parallel. Live workers heartbeat their claims; a
+    claim whose lease expires (its worker died) is handed to the next worker.
+    Items that exhausted their attempts are retried on the next drain.
+    """
+
+    def __init__(self, db_path: str = config.JOB_QUEUE_PATH,
+                 lease_seconds: float = config.JOB_LEASE_SECONDS,
+                 max_attempts: int = config.JOB_MAX_ATTEMPTS):
+        self.db_path = db_path
+        self.lease_seconds = lease_seconds
+        self.max_attempts = max_attempts
+        with self._connect() as conn:
+            conn.execute("PRAGMA journal_mode=WAL")
+            conn.executescript(SCHEMA)
+
+    @contextmanager
+    def _connect(self):
+        # One short-lived connection per operation keeps workers thread-safe.
+        conn = sqlite3.connect(self.db_path, timeout=30, isolation_level=None)
+        try:
+            yield conn
+        finally:
+            conn.close()
+
+    @contextmanager
+    def _transaction(self):
+        with self._connect() as conn:
+            conn.execute("BEGIN IMMEDIATE")
+            try:
+                yield conn
+            except BaseException:
+                conn.execute("ROLLBACK")
+                raise
+            conn.execute("COMMIT")
+
+    def enqueue(self, run_id: str, stage: str, items: Iterable[Tuple[str, Optional[str]]]):
+        """Adds (item_id, payload) pairs. Items already in the queue are left untouched."""
+        with self._connect() as conn:
+            conn.executemany(
+                "INSERT OR IGNORE INTO tasks (run_id, stage, item_id, payload) VALUES (?, ?, ?, ?)",
+                [(run_id, stage, item_id, payload) for item_id, payload in items]
+            )
+
+    def claim(self, run_id: str, stage: str, worker: str) -> Optional[Tuple[str, Optional[str]]]:
+        """Atomically takes the next pending (or lease-expired) item, or returns None."""
+        now = time.time()
+        with self._transaction() as conn:
+            # Two indexed lookups rather than one OR, which would scan every done row.
+            row = conn.execute(
+                "SELECT item_id, payload FROM tasks WHERE run_id = ? AND stage = ? "
+                "AND status = 'pending' ORDER BY rowid LIMIT 1",
+                (run_id, stage)
+            ).fetchone()
+            if row is None:
+                row = conn.execute(
+                    "SELECT item_id, payload FROM tasks WHERE run_id = ? AND stage = ? "
+                    "AND status = 'running' AND claimed_at < ? ORDER BY rowid LIMIT 1",
+                    (run_id, stage, now - self.lease_seconds)
+                ).fetchone()
+            if row is not None:
+                conn.execute(
+                    "UPDATE tasks SET status = 'running', worker = ?, claimed_at = ?, "
+                    "attempts = attempts + 1 WHERE run_id = ? AND stage = ? AND item_id = ?",
+                    (worker, now, run_id, stage, row[0])
+                )
+        return row
+
+    def complete(self, run_id: str, stage: str, item_id: str, result: Optional[str],
+                 next_stage: Optional[str] = None, worker: Optional[str] = None):
+        """
+        Marks an item done. With `next_stage`, a non-None result is handed to
+        that stage as its payload in the same transaction instead of being
+        stored here. With `worker`, the result is only recorded while that
+        worker still holds the item or it was released and not yet re-claimed.
+        """
+        owned, params = _owned(worker)
+        with self._transaction() as conn:
+            forward = next_stage is not None and result is not None
+            updated = conn.execute(
+                "UPDATE tasks SET status = 'done', result = ?, error = NULL "
+                "WHERE run_id = ? AND stage = ? AND item_id = ?" + owned,
+                [None if forward else result, run_id, stage, item_id, *params]
+            ).rowcount
+            if forward and updated:
+                conn.execute(
+                    "INSERT OR IGNORE INTO tasks (run_id, stage, item_id, payload) VALUES (?, ?, ?, ?)",
+                    (run_id, next_stage, item_id, result)
+                )
+
+    def fail(self, run_id: str, stage: str, item_id: str, error: str, worker: Optional[str] = None):
+        """Returns an item to the queue, or marks it failed after max_attempts."""
+        owned, params = _owned(worker)
+        with self._connect() as conn:
+            conn.execute(
+                "UPDATE tasks SET error = ?, status = CASE WHEN attempts >= ? "
+                "THEN 'failed' ELSE 'pending' END WHERE run_id = ? AND stage = ? AND item_id = ?" + owned,
+                [error, self.max_attempts, run_id, stage, item_id, *params]
+            )
+
+    def release(self, run_id: str, stage: str, worker_prefix: str):
+        """
+        Puts every item held by workers named `worker_prefix`-* back as pending
+        without spending an attempt, so an interrupted run's claims are picked
+        up immediately instead of after the lease.
+        """
+        with self._connect() as conn:
+            conn.execute(
+                "UPDATE tasks SET status = 'pending', worker = NULL, claimed_at = NULL, "
+                "attempts = MAX(attempts - 1, 0) "
+                "WHERE run_id = ? AND stage = ? AND status = 'running' AND worker LIKE ?",
+                (run_id, stage, f"{worker_prefix}-%")
+            )
+
+    def retry_failed(self, run_id: str, stage: str):
+        """Gives items that exhausted their attempts (e.g., during an outage) a fresh start."""
+        with self._connect() as conn:
+            conn.execute(
+                "UPDATE tasks SET status = 'pending', attempts = 0 "
+                "WHERE run_id = ? AND stage = ? AND status = 'failed'",
+                (run_id, stage)
+            )
+
+    def heartbeat(self, run_id: str, stage: str, worker_prefix: str):
+        """Renews the lease on every item held by workers named `worker_prefix`-*."""
+        with self._connect() as conn:
+            conn.execute(
+                "UPDATE tasks SET claimed_at = ? WHERE run_id = ? AND stage = ? "
+                "AND status = 'running' AND worker LIKE ?",
+                (time.time(), run_id, stage, f"{worker_prefix}-%")
+            )
+
+    def has_open(self, run_id: str, stage: str) -> bool:
+        """True while any item of the stage is pending or being worked on."""
+        with self._connect() as conn:
+            return conn.execute(
+                "SELECT 1 FROM tasks WHERE run_id = ? AND stage = ? "
+                "AND status IN ('pending', 'running') LIMIT 1",
+                (run_id, stage)
+            ).fetchone() is not None
+
+    def failed(self, run_id: str, stage: str) -> Dict[str, Optional[str]]:
+        """Returns {item_id: payload} for items that exhausted their attempts."""
+        with self._connect() as conn:
+            rows = conn.execute(
+                "SELECT item_id, payload FROM tasks WHERE run_id = ? AND stage = ? AND status = 'failed' "
+                "ORDER BY rowid",
+                (run_id, stage)
+            ).fetchall()
+        return dict(rows)
+
+    def counts(self, run_id: str, stage: str) -> Dict[str, int]:
+        with self._connect() as conn:
+            rows = conn.execute(
+                "SELECT status, COUNT(*) FROM tasks WHERE run_id = ? AND stage = ? GROUP BY status",
+                (run_id, stage)
+            ).fetchall()
+        return dict(rows)
+
+    def results(self, run_id: str, stage: str,
+                item_ids: Optional[List[str]] = None) -> Dict[str, Optional[str]]:
+        """Returns {item_id: result} for completed items of a stage, optionally only `item_ids`."""
+        query = "SELECT item_id, result FROM tasks WHERE run_id = ? AND stage = ? AND status = 'done'"
+        params = [run_id, stage]
+        if item_ids is not None:
+            if not item_ids:
+                return {}
+            query += f" AND item_id IN ({', '.join('?' * len(item_ids))})"
+            params += list(item_ids)
+        with self._connect() as conn:
+            rows = conn.execute(query + " ORDER BY rowid", params).fetchall()
+        return dict(rows)
+
+    def drain(self, run_id: str, stage: str, handler: Callable[[str, Optional[str]], Optional[str]],
+              workers: int = 1, next_stage: Optional[str] = None, poll_seconds: float = 1.0):
+        """
+        Runs `handler(item_id, payload) -> result` over every item of a stage
+        with `workers` threads. Items that failed in an earlier drain are
+        retried first. Returns once no item is pending or held by another
+        live worker. If the drain is interrupted (Ctrl-C or a Streamlit rerun
+        in the calling thread, or a handler raising a BaseException), no new
+        items are claimed and every item this drain holds is released, so the
+        next run picks them up immediately. Handlers already running finish in
+        the background and still record their result if nobody re-claimed
+        the item.
+        """
+        self.retry_failed(run_id, stage)
+        stop = threading.Event()
+        prefix = f"{threading.get_ident()}-{time.time()}"
+
+        def work(worker: str):
+            while not stop.is_set():
+                task = self.claim(run_id, stage, worker)
+                if task is None:
+                    return
+                if stop.is_set():
+                    # Interrupted while claiming; hand the item straight back.
+                    self.release(run_id, stage, prefix)
+                    return
+                item_id, payload = task
+                try:
+                    result = handler(item_id, payload)
+                except Exception as e:
+                    print(f"Error in stage '{stage}' for {item_id}: {e}")
+                    traceback.print_exc()
+                    self.fail(run_id, stage, item_id, str(e), worker)
+                    continue
+                except BaseException:
+                    stop.set()
+                    raise
+                self.complete(run_id, stage, item_id, result, next_stage, worker)
+
+        def keep_alive():
+            while not beating_done.wait(self.lease_seconds / 3):
+                self.heartbeat(run_id, stage, prefix)
+
+        beating_done = threading.Event()
+        beat = threading.Thread(target=keep_alive, daemon=True)
+        beat.start()
+        try:
+            while True:
+                pool = ThreadPoolExecutor(max_workers=workers)
+                try:
+                    futures = [pool.submit(work, f"{prefix}-{i}") for i in range(workers)]
+                    # Signals are only delivered to this thread, so the
+                    # interrupt surfaces here, not in the workers.
+                    for future in futures:
+                        future.result()
+                except BaseException:
+                    stop.set()
+                    pool.shutdown(wait=False, cancel_futures=True)
+                    self.release(run_id, stage, prefix)
+                    raise
+                pool.shutdown()
+                if not self.has_open(run_id, stage):
+                    return
+                time.sleep(poll_seconds)
+        finally:
+            beating_done.set()
+            beat.join()
@@ -1,17 +1,27 @@
 
 import os
 import json
-from openai import OpenAI
 from pydantic import BaseModel
 from typing import Type
 import config
 
 from tenacity import retry, stop_after_attempt, wait_random_exponential
 
-client = OpenAI(
-    base_url="https://openrouter.ai/api/v1",
-    api_key=os.environ.get("OPENROUTER_API_KEY"),
-)
+_clients = {}
+
+def get_client():
+    """
+    Builds the OpenRouter client on first use instead of at import time.
+    One client is kept per API key, so a key entered after import is picked up.
+    """
+    api_key = os.environ.get("OPENROUTER_API_KEY")
+    if api_key not in _clients:
+        from openai import OpenAI
+        _clients[api_key] = OpenAI(
+            base_url="https://openrouter.ai/api/v1",
+            api_key=api_key,
+        )
+    return _clients[api_key]
 
 
 @retry(wait=wait_random_exponential(min=1, max=60), stop=stop_after_attempt(3))
@@ -23,7 +33,7 @@ def robust_llm_call(prompt: str, response_model: Type[BaseModel], model: str):
     try:
         print(f"LLM Call: Pydantic parsing with {model}...")
         
-        response = client.chat.completions.create(
+        response = get_client().chat.completions.create(
             model=model,
             messages=[{"role": "user", "content": prompt}],
             response_format={"type": "json_object"} 
@@ -47,7 +57,7 @@ def generative_llm_call(prompt: str, model: str):
     try:
         print(f"LLM Call: Generative explanation with {model}...")
         
-        response = client.chat.completions.create(
+        response = get_client().chat.completions.create(
             model=model,
             messages=[{"role": "user", "content": prompt}],
             response_format={"type": "json_object"}
@@ -75,6 +85,13 @@ def parse_resume(resume_text: str) -> config.ParsedResume:
     )
     return robust_llm_call(prompt, config.ParsedResume, config.LLM_PARSING_MODEL)
 
+# Placeholder fields used when the explanation LLM call fails for good.
+EXPLANATION_FALLBACK = {
+    "strengths": "Error generating AI analysis.",
+    "gaps": "Error generating AI analysis.",
+    "notes": "System error."
+}
+
 def generate_explanation(report_data: dict) -> dict:
     """Uses LLM to generate the final human-readable report."""
     prompt = config.PROMPT_EXPLAIN_MATCH.format(**report_data)
@@ -85,11 +102,5 @@ def generate_explanation(report_data: dict) -> dict:
         return report_data
     except Exception as e:
         print(f"Error in explanation LLM call (final attempt failed): {e}")
-        report_data.update({
-            "strengths": "Error generating AI analysis.",
-            "gaps": "Error generating AI analysis.",
-            "notes": "System error."
-        })
+        report_data.update(EXPLANATION_FALLBACK)
         return report_data
-
-print("File 'llm_interface.py' (Final Version with Import Fix) created.")
@@ -3,109 +3,220 @@
 
 import utils
 import llm_interface
-from retrieval import HybridRetriever
+from retrieval import HybridRetriever, job_field_queries, job_field_weights, resume_fields
 from scoring import ScoringEngine
+from job_queue import JobQueue
+from candidate_store import CandidateStore
 import config
-from typing import List
-import traceback
+from typing import List, Optional
+import hashlib
+import json
+import os
+
+def _run_id(*parts) -> str:
+    """Stable ID for a pipeline run, so re-submitting the same inputs resumes it."""
+    return hashlib.sha256("\n".join(map(str, parts)).encode("utf-8")).hexdigest()[:16]
 
 class CandidateMatchingSystem:
-    def __init__(self):
+    def __init__(self, llm=llm_interface, queue: Optional[JobQueue] = None,
+                 persist_dir: Optional[str] = None):
         self.job = None
-        self.candidates_db = {} 
-        self.retriever = HybridRetriever()
+        self.job_id = None
+        self.candidates_db = {}
+        self.resume_paths = {}
+        self.run_id = None
+        self.streamed = False
+        self.llm = llm
+        self.queue = queue or JobQueue()
+        self.retriever = HybridRetriever(persist_dir=persist_dir)
         self.scorer = ScoringEngine()
         print("CandidateMatchingSystem initialized.")
 
+    def _job_stage(self, _item_id: str, job_text: str) -> str:
+        job = self.llm.parse_job_posting(job_text)
+        if not job:
+            # Raise so the failure is retried rather than checkpointed.
+            raise Exception("LLM failed to parse job posting.")
+        return job.model_dump_json()
+
     def process_job_posting(self, job_file: str):
-        """Loads and parses the job posting."""
+        """
+        Loads and parses the job posting. The parse is checkpointed under a
+        hash of the posting text, so the same posting always yields the same
+        ParsedJob and the saved retrieval, scores and explanations stay valid.
+        """
         job_text = utils.extract_text(job_file)
         if not job_text:
             raise Exception("Job posting file is empty or unreadable.")
-        
-        self.job = llm_interface.parse_job_posting(job_text)
-        if not self.job:
+
+        self.job_id = _run_id(job_text)
+        self.queue.enqueue(self.job_id, "job", [("job", job_text)])
+        self.queue.drain(self.job_id, "job", self._job_stage)
+        parsed_json = self.queue.results(self.job_id, "job").get("job")
+        if not parsed_json:
             raise Exception("LLM failed to parse job posting.")
-        
+
+        self.job = config.ParsedJob.model_validate_json(parsed_json)
         print(f"Successfully parsed job: {self.job.job_title}")
 
-    def process_resumes(self, resume_files: List[str]):
-        """Loads and parses all candidate resumes."""
+    def _extract_stage(self, digest: str, enqueued_path: str) -> Optional[str]:
+        # Prefer this run's copy; the path recorded at enqueue time may be gone.
+        f = self.resume_paths.get(digest, enqueued_path)
+        print(f"Processing file: {f}")
+        resume_text = utils.extract_text(f)
+        if not resume_text:
+            print(f"Skipping empty or unreadable file: {f}")
+            return None
+        return resume_text
+
+    def _parse_stage(self, digest: str, resume_text: str) -> Optional[str]:
+        f = self.resume_paths.get(digest, digest)
+        parsed_resume = self.llm.parse_resume(resume_text)
+        if not parsed_resume:
+            print(f"LLM failed to parse resume: {f}")
+            return None
+        print(f"Successfully parsed: {f.split('/')[-1]}")
+        return parsed_resume.model_dump_json()
+
+    def process_resumes(self, resume_files: List[str], run_id: Optional[str] = None,
+                        workers: int = config.JOB_QUEUE_WORKERS):
+        """
+        Loads and parses all candidate resumes. Every file is checkpointed in
+        the job queue after each stage under a hash of its contents, so
+        calling this again with the same files resumes where an interrupted
+        run stopped, even if they were saved under new names (e.g., a
+        re-upload), while an edited file is parsed again.
+        """
         self.candidates_db = {}
-        
-        print(f"Starting processing for {len(resume_files)} resumes...")
-        
+        self.streamed = False
+        self.resume_paths = {}
         for f in resume_files:
-            try:
-                print(f"Processing file: {f}")
-                resume_text = utils.extract_text(f)
-                if not resume_text:
-                    print(f"Skipping empty or unreadable file: {f}")
-                    continue
-                
-                parsed_resume = llm_interface.parse_resume(resume_text)
-                if parsed_resume:
-                    file_id = f.split('/')[-1]
-                    self.candidates_db[file_id] = parsed_resume
-                    print(f"Successfully parsed: {file_id}")
-                else:
-                    print(f"LLM failed to parse resume: {f}")
-            except Exception as e:
-                print(f"Error processing resume {f}: {str(e)}")
-                traceback.print_exc()
-                continue 
-        
+            self.resume_paths.setdefault(utils.file_digest(f), f)
+        self.run_id = run_id or _run_id(*sorted(self.resume_paths))
+
+        print(f"Starting processing for {len(resume_files)} resumes (run {self.run_id})...")
+
+        self.queue.enqueue(self.run_id, "extract", list(self.resume_paths.items()))
+        self.queue.drain(self.run_id, "extract", self._extract_stage, workers, next_stage="parse")
+        self.queue.drain(self.run_id, "parse", self._parse_stage, workers)
+
+        for digest, parsed_json in self.queue.results(self.run_id, "parse").items():
+            if parsed_json and digest in self.resume_paths:
+                file_id = self.resume_paths[digest].split('/')[-1]
+                self.candidates_db[file_id] = config.ParsedResume.model_validate_json(parsed_json)
+
         print(f"Successfully parsed {len(self.candidates_db)} out of {len(resume_files)} resumes.")
 
-    def run_matching_pipeline(self) -> List[dict]:
+    def ingest_directory(self, resume_dir: str, chunk_size: int = config.INGEST_CHUNK_SIZE,
+                         run_id: Optional[str] = None, workers: int = config.JOB_QUEUE_WORKERS):
+        """
+        Streaming alternative to `process_resumes` for very large pools.
+        Files are read lazily from `resume_dir` in chunks of `chunk_size`; each
+        chunk is parsed, flushed to the on-disk index and candidate store, and
+        dropped before the next one is read, so memory stays bounded by the
+        chunk size (and DENSE_SEARCH_BLOCK_ROWS when searching). Chunks already
+        in the store are skipped on re-runs.
+        """
+        if self.retriever.persist_dir is None:
+            raise Exception("Streaming ingestion requires a persist_dir for the index and candidate store.")
+
+        self.candidates_db = CandidateStore(os.path.join(self.retriever.persist_dir, "candidates.sqlite3"))
+        self.streamed = True
+        self.run_id = run_id or _run_id(os.path.abspath(resume_dir))
+
+        print(f"Streaming resumes from {resume_dir} in chunks of {chunk_size} (run {self.run_id})...")
+
+        seen = 0
+        for chunk in utils.chunked(utils.iter_resume_files(resume_dir), chunk_size):
+            seen += len(chunk)
+            missing = set(self.candidates_db.missing([f.split('/')[-1] for f in chunk]))
+            files = [f for f in chunk if f.split('/')[-1] in missing]
+            if not files:
+                continue
+
+            self.resume_paths = {}
+            for f in files:
+                self.resume_paths.setdefault(utils.file_digest(f), f)
+            self.queue.enqueue(self.run_id, "extract", list(self.resume_paths.items()))
+            self.queue.drain(self.run_id, "extract", self._extract_stage, workers, next_stage="parse")
+            self.queue.drain(self.run_id, "parse", self._parse_stage, workers)
+
+            parsed = {
+                self.resume_paths[digest].split('/')[-1]: config.ParsedResume.model_validate_json(parsed_json)
+                for digest, parsed_json in self.queue.results(self.run_id, "parse", list(self.resume_paths)).items()
+                if parsed_json
+            }
+            # Index before storing: a chunk counts as done once it is in the
+            # store, and re-indexing an interrupted chunk just overwrites it.
+            self.retriever.add_fields([resume_fields(res) for res in parsed.values()], list(parsed))
+            self.candidates_db.put_many(parsed)
+            print(f"Flushed chunk of {len(parsed)} candidates ({seen} files seen).")
+
+        print(f"Candidate store holds {len(self.candidates_db)} candidates from {seen} files.")
+
+    def _index_stage(self, _item_id: str, _payload) -> str:
+        if not self.streamed:
+            corpus = [resume_fields(res) for res in self.candidates_db.values()]
+            corpus_ids = list(self.candidates_db.keys())
+
+            self.retriever.index_fields(corpus, corpus_ids)
+
+        k_to_retrieve = min(len(self.candidates_db), config.TOP_K_RETRIEVAL)
+        field_queries = job_field_queries(self.job)
+
+        return json.dumps(self.retriever.search_fields(
+            field_queries, top_k=k_to_retrieve, weights=job_field_weights(self.job)
+        ))
+
+    def _score_stage(self, candidate_id: str, _payload) -> Optional[str]:
+        candidate = self.candidates_db.get(candidate_id)
+        if not candidate:
+            print(f"Warning: Could not find candidate for ID {candidate_id}")
+            return None
+
+        report = self.scorer.score_candidate(self.job, candidate)
+        report["filename"] = candidate_id
+        return json.dumps(report)
+
+    def _explain_stage(self, candidate_id: str, report_json: str) -> str:
+        explained = self.llm.generate_explanation(json.loads(report_json))
+        # generate_explanation swallows LLM errors; raise so the placeholder is
+        # never checkpointed and the next run retries the explanation.
+        if all(explained.get(k) == v for k, v in llm_interface.EXPLANATION_FALLBACK.items()):
+            raise Exception(f"Explanation LLM call failed for {candidate_id}.")
+        return json.dumps(explained)
+
+    def run_matching_pipeline(self, workers: int = config.JOB_QUEUE_WORKERS) -> List[dict]:
         """
         Runs the full retrieve -> re-rank -> explain pipeline.
+        Retrieval, scores and explanations are checkpointed per job and
+        resume pool, so re-running the same requisition resumes or reuses them.
         """
         if not self.job or not self.candidates_db:
             raise Exception("Job and resumes must be processed first.")
-            
-        corpus = [res.full_text_summary for res in self.candidates_db.values()]
-        corpus_ids = list(self.candidates_db.keys())
-        
-        if not corpus:
-             return []
-
-        self.retriever.index(corpus, corpus_ids)
-        
-
-        k_to_retrieve = min(len(corpus_ids), config.TOP_K_RETRIEVAL)
-        query = self.job.responsibilities_summary
-        
-        candidate_ids_to_rank = self.retriever.search(query, top_k=k_to_retrieve)
-        
+
+        job_run = _run_id(self.run_id, len(self.candidates_db), self.job_id)
+
+        self.queue.enqueue(job_run, "index", [("retrieval", None)])
+        self.queue.drain(job_run, "index", self._index_stage)
+        retrieved = self.queue.results(job_run, "index").get("retrieval")
+        if retrieved is None:
+            raise Exception("Retrieval failed.")
+        candidate_ids_to_rank = json.loads(retrieved)
+
         print(f"Re-ranking {len(candidate_ids_to_rank)} candidates...")
-        
-        reports = []
-        for candidate_id in candidate_ids_to_rank:
-            candidate = self.candidates_db.get(candidate_id)
-            if not candidate:
-                print(f"Warning: Could not find candidate for ID {candidate_id}")
-                continue
-                
-            try:
-                report = self.scorer.score_candidate(self.job, candidate)
-                report["filename"] = candidate_id
-                reports.append(report)
-            except Exception as e:
-                print(f"Error scoring candidate {candidate_id}: {e}")
-                continue
 
-        explained_reports = []
-        for report in reports:
-            try:
-                explained_report = llm_interface.generate_explanation(report)
-                explained_reports.append(explained_report)
-            except Exception as e:
-                 print(f"Error generating explanation for {report.get('filename')}: {e}")
-                 explained_reports.append(report)
-            
+        self.queue.enqueue(job_run, "score", [(cid, None) for cid in candidate_ids_to_rank])
+        self.queue.drain(job_run, "score", self._score_stage, workers, next_stage="explain")
+        self.queue.drain(job_run, "explain", self._explain_stage, workers)
+
+        explained_reports = [json.loads(r) for r in self.queue.results(job_run, "explain").values()]
+        # Candidates whose explanation still failed are shown with the placeholder
+        # for this run only; it is not saved, so the next run retries them.
+        for candidate_id, report_json in self.queue.failed(job_run, "explain").items():
+            print(f"Error generating explanation for {candidate_id}; showing scores only.")
+            explained_reports.append({**json.loads(report_json), **llm_interface.EXPLANATION_FALLBACK})
+
         sorted_reports = sorted(explained_reports, key=lambda r: r['final_score'], reverse=True)
-        
-        return sorted_reports
 
-print("File 'matching_system.py' (Final Robust Version) created.")
+        return sorted_reports
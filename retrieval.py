@@ -1,84 +1,519 @@
-
-from rank_bm25 import BM25Okapi
-from sentence_transformers import SentenceTransformer
 import numpy as np
 import config
 from utils import simple_tokenizer
-import chromadb
-from chromadb.utils import embedding_functions
+from embeddings import EmbeddingCache
+from collections import Counter, defaultdict
+from contextlib import contextmanager
+from functools import cached_property
+from typing import Dict, List, Optional, Sequence, Union
+import math
+import os
+import sqlite3
+import uuid
+
+SUMMARY_FIELD = "summary"
+
+
+def resume_fields(resume: config.ParsedResume) -> Dict[str, str]:
+    """Splits a parsed resume into the separately indexed retrieval fields."""
+    return {
+        "skills": ", ".join(resume.skills),
+        "experience": "\n".join(f"{exp.title}: {exp.description}" for exp in resume.experience),
+        SUMMARY_FIELD: resume.full_text_summary,
+    }
+
+
+def job_field_queries(job: config.ParsedJob) -> Dict[str, str]:
+    """
+    Builds one query per retrieval field from a parsed job. Must-haves are
+    listed twice in the skills query so BM25 weighs them above important skills.
+    """
+    must_have = ", ".join(job.skills.must_have)
+    return {
+        "skills": ", ".join(filter(None, [must_have, must_have, ", ".join(job.skills.important)])),
+        "experience": job.job_title,
+        SUMMARY_FIELD: job.responsibilities_summary,
+    }
+
+
+def job_field_weights(job: config.ParsedJob) -> Dict[str, float]:
+    """
+    Per-field weights for one job. The skills field gains weight with each
+    must-have (up to MUST_HAVE_BOOST_CAP), and a field the job gives no query
+    text for (no skills, no title) gets no weight.
+    """
+    weights = dict(config.RETRIEVAL_FIELD_WEIGHTS)
+    n_must_have = min(len(job.skills.must_have), config.MUST_HAVE_BOOST_CAP)
+    weights["skills"] *= 1 + config.MUST_HAVE_FIELD_BOOST * n_must_have
+    if not job.skills.must_have and not job.skills.important:
+        weights["skills"] = 0.0
+    if not job.job_title.strip():
+        weights["experience"] = 0.0
+    return weights
+
+
+class SqliteBM25:
+    """
+    BM25 over an on-disk inverted index, for corpora too large to keep
+    tokenized in memory like `BM25Okapi` does. Documents can be appended in
+    chunks; scoring and top-k selection run inside SQLite. Uses the
+    non-negative idf variant log(1 + (N - n + 0.5) / (n + 0.5)).
+    """
+
+    SCHEMA = """
+    CREATE TABLE IF NOT EXISTS docs (
+        field  TEXT NOT NULL,
+        doc_id TEXT NOT NULL,
+        length INTEGER NOT NULL,
+        PRIMARY KEY (field, doc_id)
+    ) WITHOUT ROWID;
+    CREATE TABLE IF NOT EXISTS postings (
+        field  TEXT NOT NULL,
+        term   TEXT NOT NULL,
+        doc_id TEXT NOT NULL,
+        tf     INTEGER NOT NULL,
+        PRIMARY KEY (field, term, doc_id)
+    ) WITHOUT ROWID;
+    """
+
+    def __init__(self, db_path: str, k1: float = 1.5, b: float = 0.75):
+        self.db_path = db_path
+        self.k1 = k1
+        self.b = b
+        with self._connect() as conn:
+            conn.execute("PRAGMA journal_mode=WAL")
+            conn.executescript(self.SCHEMA)
+
+    @contextmanager
+    def _connect(self):
+        conn = sqlite3.connect(self.db_path, timeout=30, isolation_level=None)
+        try:
+            yield conn
+        finally:
+            conn.close()
+
+    def add(self, field: str, doc_ids: List[str], tokenized_docs: List[List[str]]):
+        """Appends documents to `field`. Documents already indexed are skipped."""
+        with self._connect() as conn:
+            conn.execute("BEGIN")
+            for doc_id, tokens in zip(doc_ids, tokenized_docs):
+                inserted = conn.execute(
+                    "INSERT OR IGNORE INTO docs (field, doc_id, length) VALUES (?, ?, ?)",
+                    (field, doc_id, len(tokens))
+                ).rowcount
+                if inserted:
+                    conn.executemany(
+                        "INSERT INTO postings (field, term, doc_id, tf) VALUES (?, ?, ?, ?)",
+                        [(field, term, doc_id, tf) for term, tf in Counter(tokens).items()]
+                    )
+            conn.execute("COMMIT")
+
+    def clear(self):
+        with self._connect() as conn:
+            conn.execute("DELETE FROM postings")
+            conn.execute("DELETE FROM docs")
+
+    def top_k(self, field: str, query_tokens: List[str], top_k: int) -> List[str]:
+        query_tf = Counter(query_tokens)
+        if not query_tf:
+            return []
+        terms = list(query_tf)
+        with self._connect() as conn:
+            n_docs, avg_len = conn.execute(
+                "SELECT COUNT(*), AVG(length) FROM docs WHERE field = ?", (field,)
+            ).fetchone()
+            if not n_docs:
+                return []
+            doc_freqs = dict(conn.execute(
+                f"SELECT term, COUNT(*) FROM postings WHERE field = ? "
+                f"AND term IN ({', '.join('?' * len(terms))}) GROUP BY term",
+                [field, *terms]
+            ))
+            weights = []
+            for term in terms:
+                df = doc_freqs.get(term, 0)
+                idf = math.log(1 + (n_docs - df + 0.5) / (df + 0.5))
+                weights += [term, idf * query_tf[term]]
+
+            rows = conn.execute(
+                f"WITH q(term, weight) AS (VALUES {', '.join(['(?, ?)'] * len(terms))}) "
+                "SELECT p.doc_id, SUM(q.weight * p.tf * (? + 1) / "
+                "(p.tf + ? * (1 - ? + ? * d.length / ?))) AS score "
+                "FROM q JOIN postings p ON p.field = ? AND p.term = q.term "
+                "JOIN docs d ON d.field = p.field AND d.doc_id = p.doc_id "
+                "GROUP BY p.doc_id ORDER BY score DESC LIMIT ?",
+                [*weights, self.k1, self.k1, self.b, self.b, max(avg_len, 1e-9), field, top_k]
+            ).fetchall()
+        return [doc_id for doc_id, _ in rows]
+
+
+class DiskVectorIndex:
+    """
+    Exact cosine search over vectors kept on disk, for pools whose dense index
+    would not fit in memory. Each field's vectors are unit-normalized float32
+    rows appended to a flat `<field>.f32` file; a SQLite table maps rows to
+    doc ids. Search streams the file in blocks of `block_rows`, so memory is
+    bounded by the block size however many documents are indexed.
+    """
+
+    SCHEMA = """
+    CREATE TABLE IF NOT EXISTS rows (
+        row    INTEGER PRIMARY KEY,
+        doc_id TEXT NOT NULL UNIQUE
+    );
+    CREATE TABLE IF NOT EXISTS meta (
+        key   TEXT PRIMARY KEY,
+        value INTEGER NOT NULL
+    );
+    """
+
+    def __init__(self, directory: str, block_rows: int = config.DENSE_SEARCH_BLOCK_ROWS):
+        self.directory = directory
+        self.block_rows = block_rows
+        os.makedirs(directory, exist_ok=True)
+        self.db_path = os.path.join(directory, "rows.sqlite3")
+        with self._connect() as conn:
+            conn.execute("PRAGMA journal_mode=WAL")
+            conn.executescript(self.SCHEMA)
+
+    @contextmanager
+    def _connect(self):
+        conn = sqlite3.connect(self.db_path, timeout=30, isolation_level=None)
+        try:
+            yield conn
+        finally:
+            conn.close()
+
+    def _path(self, field: str) -> str:
+        return os.path.join(self.directory, f"{field}.f32")
+
+    @staticmethod
+    def _normalize(vectors) -> np.ndarray:
+        vectors = np.asarray(vectors, dtype=np.float32)
+        norms = np.linalg.norm(vectors, axis=1, keepdims=True)
+        return vectors / np.maximum(norms, 1e-12)
+
+    def add(self, doc_ids: List[str], field_vectors: Dict[str, np.ndarray]):
+        """
+        Stores one vector per doc id for every field. A doc id that is already
+        indexed has its vectors overwritten in place, like Chroma's upsert.
+        """
+        if not doc_ids:
+            return
+        with self._connect() as conn:
+            conn.execute("BEGIN IMMEDIATE")
+            try:
+                dim = next(iter(field_vectors.values())).shape[1]
+                stored_dim = conn.execute("SELECT value FROM meta WHERE key = 'dim'").fetchone()
+                if stored_dim is None:
+                    conn.execute("INSERT INTO meta (key, value) VALUES ('dim', ?)", (dim,))
+                elif stored_dim[0] != dim:
+                    raise Exception(f"Vector dimension {dim} does not match the index ({stored_dim[0]}).")
+
+                next_row = conn.execute("SELECT COUNT(*) FROM rows").fetchone()[0]
+                rows, new = [], []
+                for doc_id in doc_ids:
+                    found = conn.execute("SELECT row FROM rows WHERE doc_id = ?", (doc_id,)).fetchone()
+                    if found is None:
+                        found = (next_row,)
+                        new.append((next_row, doc_id))
+                        next_row += 1
+                    rows.append(found[0])
+
+                # Vectors are written before the rows are committed, so a crash
+                # never leaves a committed row pointing at missing data.
+                order = np.argsort(rows, kind="stable")
+                for field, vectors in field_vectors.items():
+                    vectors = self._normalize(vectors)
+                    path = self._path(field)
+                    with open(path, "r+b" if os.path.exists(path) else "w+b") as f:
+                        for i in order:
+                            f.seek(rows[i] * dim * 4)
+                            f.write(vectors[i].tobytes())
+
+                conn.executemany("INSERT INTO rows (row, doc_id) VALUES (?, ?)", new)
+            except BaseException:
+                conn.execute("ROLLBACK")
+                raise
+            conn.execute("COMMIT")
+
+    def clear(self):
+        with self._connect() as conn:
+            conn.execute("DELETE FROM rows")
+            conn.execute("DELETE FROM meta")
+        for name in os.listdir(self.directory):
+            if name.endswith(".f32"):
+                os.remove(os.path.join(self.directory, name))
+
+    def top_k(self, field: str, query_vectors, top_k: int) -> List[List[str]]:
+        """Returns the `top_k` doc ids by cosine similarity for each query vector, best first."""
+        queries = self._normalize(query_vectors)
+        with self._connect() as conn:
+            n_rows = conn.execute("SELECT COUNT(*) FROM rows").fetchone()[0]
+            stored_dim = conn.execute("SELECT value FROM meta WHERE key = 'dim'").fetchone()
+        if not n_rows or not os.path.exists(self._path(field)) or top_k <= 0:
+            return [[] for _ in queries]
+        dim = stored_dim[0]
+
+        best_scores = np.empty((len(queries), 0), dtype=np.float32)
+        best_rows = np.empty((len(queries), 0), dtype=np.int64)
+        # One reused buffer, so only a single block is ever resident.
+        buffer = np.empty((min(self.block_rows, n_rows), dim), dtype=np.float32)
+        with open(self._path(field), "rb") as f:
+            for start in range(0, n_rows, self.block_rows):
+                block = buffer[:min(self.block_rows, n_rows - start)]
+                block = block[:f.readinto(block) // (dim * 4)]
+                if not len(block):
+                    break
+                scores = np.concatenate([best_scores, queries @ block.T], axis=1)
+                rows = np.concatenate(
+                    [best_rows, np.broadcast_to(np.arange(start, start + len(block)), (len(queries), len(block)))],
+                    axis=1
+                )
+                if scores.shape[1] > top_k:
+                    keep = np.argpartition(-scores, top_k - 1, axis=1)[:, :top_k]
+                    scores = np.take_along_axis(scores, keep, axis=1)
+                    rows = np.take_along_axis(rows, keep, axis=1)
+                best_scores, best_rows = scores, rows
+
+        order = np.argsort(-best_scores, axis=1, kind="stable")
+        best_rows = np.take_along_axis(best_rows, order, axis=1)
+        wanted = sorted({int(r) for r in best_rows.ravel()})
+        with self._connect() as conn:
+            doc_ids = dict(conn.execute(
+                f"SELECT row, doc_id FROM rows WHERE row IN ({', '.join('?' * len(wanted))})", wanted
+            ).fetchall()) if wanted else {}
+        return [[doc_ids[int(r)] for r in query_rows if int(r) in doc_ids] for query_rows in best_rows]
+
 
 class HybridRetriever:
-    def __init__(self):
-        self.bm25_index = None
+    def __init__(self, persist_dir: Optional[str] = None):
+        """
+        In-memory (BM25Okapi + Chroma) by default. With `persist_dir`, both
+        indexes live on disk there instead (SqliteBM25 + DiskVectorIndex), so
+        documents can be appended in chunks with `add_fields` and memory does
+        not grow with the pool. The embedding model and Chroma are only
+        loaded on first use.
+        """
+        self.bm25_indexes = {}
+        self.collections = {}
         self.corpus_ids = []
-        
-        self.sbert_model = SentenceTransformer(config.EMBEDDING_MODEL)
-        
-        self.chroma_client = chromadb.Client() 
-        
-        self.embedding_func = embedding_functions.SentenceTransformerEmbeddingFunction(
-            model_name=config.EMBEDDING_MODEL
-        )
-        
-        self.collection = self.chroma_client.get_or_create_collection(
-            name="resume_collection",
-            embedding_function=self.embedding_func
+        self.persist_dir = persist_dir
+        self.sparse_index = None
+        self.dense_index = None
+        # In-memory retrievers share one process-wide Chroma client, so each
+        # gets its own collection names and never drops another's collections.
+        self.collection_prefix = f"resume_{uuid.uuid4().hex[:12]}"
+
+        if persist_dir:
+            os.makedirs(persist_dir, exist_ok=True)
+            self.sparse_index = SqliteBM25(os.path.join(persist_dir, "bm25.sqlite3"))
+            self.dense_index = DiskVectorIndex(os.path.join(persist_dir, "dense"))
+        print("HybridRetriever initialized (embedding model and ChromaDB load on first use).")
+
+    @cached_property
+    def sbert_model(self):
+        from sentence_transformers import SentenceTransformer
+        return SentenceTransformer(config.EMBEDDING_MODEL)
+
+    @cached_property
+    def query_cache(self) -> EmbeddingCache:
+        # A getter, not the model: repeated requisitions are served from the
+        # cache without loading SentenceTransformer at all.
+        return EmbeddingCache(lambda: self.sbert_model, config.EMBEDDING_MODEL)
+
+    @cached_property
+    def chroma_client(self):
+        import chromadb
+        return chromadb.Client()
+
+    def indexed_fields(self) -> List[str]:
+        """Fields that have a dense index to search."""
+        if self.dense_index is not None:
+            return list(config.RETRIEVAL_FIELD_WEIGHTS)
+        return list(self.collections)
+
+    def _reset_collection(self, field: str):
+        """Drops and recreates the Chroma collection backing `field`."""
+        name = f"{self.collection_prefix}_{field}"
+        try:
+            self.chroma_client.delete_collection(name)
+        except Exception:
+            pass
+        # Embeddings are always supplied by us, so no embedding function.
+        self.collections[field] = self.chroma_client.create_collection(
+            name=name,
+            embedding_function=None
         )
-        print("HybridRetriever initialized with ChromaDB.")
 
     def index(self, corpus: list[str], corpus_ids: list[str]):
-        """Creates the BM25 and ChromaDB indexes."""
-        if not corpus:
+        """Creates the BM25 and ChromaDB indexes over a single summary field."""
+        self.index_fields([{SUMMARY_FIELD: doc} for doc in corpus], corpus_ids)
+
+    def index_fields(self, documents: List[Dict[str, str]], corpus_ids: List[str]):
+        """
+        Creates one BM25 index and one Chroma collection per field. Every field
+        of every document is embedded in a single batched encode call.
+        """
+        if not documents:
             print("Warning: No documents to index.")
             return
 
-        print(f"Indexing {len(corpus)} documents...")
-        self.corpus_ids = corpus_ids
-        
-        tokenized_corpus = [simple_tokenizer(doc) for doc in corpus]
-        self.bm25_index = BM25Okapi(tokenized_corpus)
-        
-        
-        existing_ids = self.collection.get()['ids']
-        if existing_ids:
-            print(f"Clearing {len(existing_ids)} old items from ChromaDB.")
-            self.collection.delete(ids=existing_ids)
-        
-        self.collection.add(
-            documents=corpus,
-            ids=corpus_ids
-        )
+        if self.dense_index is not None:
+            self.reset()
+            self.add_fields(documents, corpus_ids)
+            return
+
+        fields = sorted({field for doc in documents for field in doc})
+        print(f"Indexing {len(documents)} documents across fields {fields}...")
+        self.corpus_ids = list(corpus_ids)
+        self.bm25_indexes = {}
+        self.collections = {}
+
+        field_texts = {field: [doc.get(field) or "" for doc in documents] for field in fields}
+        all_texts = [text for field in fields for text in field_texts[field]]
+        all_embeddings = self.sbert_model.encode(all_texts, convert_to_numpy=True)
+
+        for i, field in enumerate(fields):
+            texts = field_texts[field]
+            tokenized_corpus = [simple_tokenizer(text) for text in texts]
+            if any(tokenized_corpus):
+                from rank_bm25 import BM25Okapi
+                self.bm25_indexes[field] = BM25Okapi(tokenized_corpus)
+
+            embeddings = all_embeddings[i * len(documents):(i + 1) * len(documents)]
+            self._reset_collection(field)
+            self.collections[field].add(
+                documents=texts,
+                embeddings=embeddings.tolist(),
+                ids=self.corpus_ids
+            )
         print("Indexing complete.")
 
-    def search(self, query: str, top_k: int) -> list[str]:
+    def reset(self):
+        """Empties every persistent field index."""
+        self.dense_index.clear()
+        self.sparse_index.clear()
+
+    def add_fields(self, documents: List[Dict[str, str]], corpus_ids: List[str]):
+        """
+        Appends one chunk of documents to the persistent field indexes, so a
+        large pool can be indexed without ever holding all of it in memory.
         """
-        Performs hybrid search.
+        if self.dense_index is None:
+            raise Exception("add_fields() requires a HybridRetriever with a persist_dir.")
+        if not documents:
+            return
+
+        fields = sorted(config.RETRIEVAL_FIELD_WEIGHTS)
+        field_texts = {field: [doc.get(field) or "" for doc in documents] for field in fields}
+        all_texts = [text for field in fields for text in field_texts[field]]
+        all_embeddings = self.sbert_model.encode(all_texts, convert_to_numpy=True)
+
+        for field in fields:
+            self.sparse_index.add(field, corpus_ids, [simple_tokenizer(text) for text in field_texts[field]])
+        self.dense_index.add(list(corpus_ids), {
+            field: all_embeddings[i * len(documents):(i + 1) * len(documents)]
+            for i, field in enumerate(fields)
+        })
+
+    def embed_queries(self, queries: List[str]) -> np.ndarray:
+        """Embeds queries in one batch, re-using cached vectors where possible."""
+        return self.query_cache.encode(queries)
+
+    def _sparse_top(self, field: str, query: str, top_k: int) -> List[str]:
+        bm25_index = self.bm25_indexes.get(field)
+        if bm25_index is None:
+            if self.sparse_index is not None:
+                return self.sparse_index.top_k(field, simple_tokenizer(query), top_k)
+            return []
+        bm25_scores = bm25_index.get_scores(simple_tokenizer(query))
+        bm25_top_indices = np.argsort(bm25_scores)[::-1][:top_k]
+        # Only real matches, like SqliteBM25, so non-matching docs get no fusion credit.
+        return [self.corpus_ids[i] for i in bm25_top_indices if bm25_scores[i] > 0]
+
+    def _dense_top(self, field: str, query_embeddings: Sequence, top_k: int) -> List[List[str]]:
+        if self.dense_index is not None:
+            return self.dense_index.top_k(field, query_embeddings, top_k)
+        return self.collections[field].query(
+            query_embeddings=[list(map(float, v)) for v in query_embeddings],
+            n_results=top_k
+        )['ids']
+
+    def search(self, query: Union[str, List[str]], top_k: int,
+               query_embeddings: Optional[Sequence] = None) -> Union[List[str], List[List[str]]]:
+        """
+        Performs hybrid search on the summary field.
         1. Gets top_k from Sparse (BM25).
-        2. Gets top_k from Dense (Chroma).
+        2. Gets top_k from Dense (Chroma, or the on-disk vector index).
         3. Returns the UNION of the two lists.
+
+        `query` may be a single string or a list of queries (e.g., several jobs
+        or query variants); a list is embedded in one batch and searched in a
+        single dense search, and one ID list is returned per query.
+        `query_embeddings` lets callers pass precomputed vectors instead.
         """
-        if self.bm25_index is None:
+        if SUMMARY_FIELD not in self.indexed_fields():
             raise Exception("Must call .index() before .search()")
-            
-        print(f"Running hybrid search for query: {query[:50]}...")
-        
-        tokenized_query = simple_tokenizer(query)
-        bm25_scores = self.bm25_index.get_scores(tokenized_query)
-  
-        bm25_top_indices = np.argsort(bm25_scores)[::-1][:top_k]
-        sparse_ids = [self.corpus_ids[i] for i in bm25_top_indices]
-        print(f"BM25 found IDs: {sparse_ids}")
 
-        dense_results = self.collection.query(
-            query_texts=[query],
-            n_results=top_k
-        )
-        dense_ids = dense_results['ids'][0]
-        print(f"ChromaDB found IDs: {dense_ids}")
+        single = isinstance(query, str)
+        queries = [query] if single else list(query)
+        if not queries:
+            return []
+
+        if query_embeddings is None:
+            query_embeddings = self.embed_queries(queries)
+        if len(query_embeddings) != len(queries):
+            raise ValueError("query_embeddings must have one vector per query.")
+
+        dense_results = self._dense_top(SUMMARY_FIELD, query_embeddings, top_k)
+
+        results = []
+        for q, dense_ids in zip(queries, dense_results):
+            print(f"Running hybrid search for query: {q[:50]}...")
+
+            sparse_ids = self._sparse_top(SUMMARY_FIELD, q, top_k)
+            print(f"BM25 found IDs: {sparse_ids}")
+            print(f"Dense search found IDs: {dense_ids}")
+
+            fused_ids = list(set(sparse_ids) | set(dense_ids))
+
+            print(f"Retrieval found {len(fused_ids)} unique candidates for re-ranking.")
+            results.append(fused_ids)
 
-        fused_ids = list(set(sparse_ids) | set(dense_ids))
-        
+        return results[0] if single else results
+
+    def search_fields(self, field_queries: Dict[str, str], top_k: int,
+                      weights: Optional[Dict[str, float]] = None) -> List[str]:
+        """
+        Performs hybrid search on every indexed field and fuses the BM25 and
+        dense rankings with weighted Reciprocal Rank Fusion. Returns the
+        top_k candidates by fused score, best first.
+        """
+        indexed = self.indexed_fields()
+        if not indexed:
+            raise Exception("Must call .index_fields() before .search_fields()")
+
+        weights = weights or config.RETRIEVAL_FIELD_WEIGHTS
+        active = [f for f, q in field_queries.items()
+                  if q and weights.get(f, 0) > 0 and f in indexed]
+        if not active:
+            return []
+
+        query_embeddings = self.embed_queries([field_queries[f] for f in active])
+
+        fused_scores = defaultdict(float)
+        for field, vector in zip(active, query_embeddings):
+            query = field_queries[field]
+            print(f"Running hybrid search on '{field}' for query: {query[:50]}...")
+
+            sparse_ids = self._sparse_top(field, query, top_k)
+            dense_ids = self._dense_top(field, [vector], top_k)[0]
+
+            for ranked_ids in (sparse_ids, dense_ids):
+                for rank, candidate_id in enumerate(ranked_ids):
+                    fused_scores[candidate_id] += weights[field] / (config.RRF_K + rank + 1)
+
+        fused_ids = sorted(fused_scores, key=fused_scores.get, reverse=True)[:top_k]
         print(f"Retrieval found {len(fused_ids)} unique candidates for re-ranking.")
         return fused_ids
-
-print("File 'retrieval.py' (Upgraded with ChromaDB Fix) created.")
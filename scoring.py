@@ -1,6 +1,7 @@
 
 import config
 import re
+import skills
 from datetime import datetime
 
 class ScoringEngine:
@@ -10,23 +11,34 @@ class ScoringEngine:
 
     def _score_skills(self, required: list, candidate_keywords: list) -> float:
         """
-        --- CORRECTED LOGIC ---
         Scores skill match from 0 to 100.
-        Checks if any candidate keyword (e.g., "Python", "B.S. in CS") exists
-        inside the job requirement phrase (e.g., "5+ years of Python experience").
+        Both sides are normalized to canonical skill ids through the skill
+        index, so "JS" matches "JavaScript" and "go" no longer matches "good".
+        Candidate keywords outside the taxonomy (e.g., "B.S. in CS") are still
+        matched as whole-token phrases inside the requirement.
         """
         if not required:
             return 100.0  
         
-        matched_count = 0
-        candidate_keywords_lower = [s.lower() for s in candidate_keywords]
+        candidate_ids = set()
+        unknown_phrases = set()
+        for keyword in candidate_keywords:
+            ids = skills.extract_skill_ids(keyword)
+            if ids:
+                candidate_ids.update(ids)
+            else:
+                phrase = skills.phrase_tokens(keyword)
+                if phrase:
+                    unknown_phrases.add(phrase)
+        unknown_lengths = {len(p) for p in unknown_phrases}
         
+        matched_count = 0
         for req_phrase in required:
-            req_phrase_lower = req_phrase.lower()
-            for skill_keyword in candidate_keywords_lower:
-                if skill_keyword in req_phrase_lower:
-                    matched_count += 1
-                    break 
+            if skills.extract_skill_ids(req_phrase) & candidate_ids:
+                matched_count += 1
+            elif unknown_phrases and skills.contains_phrase(
+                    skills.phrase_tokens(req_phrase), unknown_phrases, unknown_lengths):
+                matched_count += 1
                 
         return (matched_count / len(required)) * 100
 
@@ -114,5 +126,3 @@ class ScoringEngine:
         }
         
         return report_data
-
-print("File 'scoring.py' (Final Version with Corrected Logic) created.")
@@ -0,0 +1,184 @@
+import bisect
+import re
+from functools import lru_cache
+from typing import Dict, FrozenSet, Iterable, Iterator, List, Set, Tuple
+import config
+
+# Keeps '+', '#', '.', '&' and "'" inside a token so "C++", "C#", ".NET",
+# "node.js" and "R&D" survive; a leading '.' is only kept for ".net". Hyphens
+# split, so "Python-based" yields "python" and "front-end" matches the form
+# "front end".
+TOKEN_PATTERN = re.compile(r"\.?\w[\w#+.'&]*")
+_TRAILING = ".'&"
+# Characters that end a list item or clause; ambiguous forms are judged within one.
+SEGMENT_BREAK_PATTERN = re.compile(r"[,;:|()\[\]\n\r\t\u2022]")
+LIST_JOINERS = frozenset(["and", "or"])
+
+
+def tokenize(text: str) -> List[str]:
+    """Lowercases and splits text into skill-aware tokens."""
+    return _scan(text.lower())[0]
+
+
+def _scan(text: str) -> Tuple[List[str], List[int]]:
+    """Like `tokenize` on already-lowercased text, also returning each token's start offset."""
+    tokens, starts = [], []
+    for match in TOKEN_PATTERN.finditer(text):
+        tok = match.group().rstrip(_TRAILING)
+        if tok:
+            tokens.append(tok)
+            starts.append(match.start())
+    return tokens, starts
+
+
+def _context(text: str, tokens: List[str], starts: List[int]) -> Tuple[List[bool], List[int]]:
+    """
+    For each token: whether a hyphen glues it to a neighbour, and the index of
+    the segment (list item or clause) it sits in.
+    """
+    breaks = [m.start() for m in SEGMENT_BREAK_PATTERN.finditer(text)]
+    glued = []
+    for tok, start in zip(tokens, starts):
+        end = start + len(tok)
+        glued.append((start > 0 and text[start - 1] == "-") or (end < len(text) and text[end] == "-"))
+    return glued, [bisect.bisect(breaks, start) for start in starts]
+
+
+class SkillIndex:
+    """
+    Compiled skill taxonomy. Every surface form is tokenized once and stored in
+    a hashed token trie (`_terminals` for complete forms, `_prefixes` for
+    partial ones), so lookups are dict probes instead of substring scans.
+    Ambiguous one-word forms ("go", "c") only match when their context marks
+    them as skills (see `config.AMBIGUOUS_SKILL_FORMS`).
+    """
+
+    def __init__(self, synonyms: Dict[str, List[str]], ambiguous: Iterable[str] = (),
+                 context_words: Iterable[str] = (), context_prefixes: Iterable[str] = ()):
+        self.names = sorted(synonyms)
+        self._terminals: Dict[Tuple[str, ...], int] = {}
+        self._prefixes = set()
+        self._ambiguous = {tuple(tokenize(form)) for form in ambiguous}
+        self._context_words = frozenset(context_words)
+        self._context_prefixes = frozenset(context_prefixes)
+
+        # Only the listed forms are indexed; a canonical id is not a form by
+        # itself (the "r" skill is only "r language" / "r programming").
+        for skill_id, name in enumerate(self.names):
+            for form in synonyms[name]:
+                key = tuple(tokenize(form))
+                if not key:
+                    continue
+                self._terminals.setdefault(key, skill_id)
+                for i in range(1, len(key)):
+                    self._prefixes.add(key[:i])
+
+    def __len__(self) -> int:
+        return len(self.names)
+
+    def name(self, skill_id: int) -> str:
+        return self.names[skill_id]
+
+    def _walk(self, tokens: List[str], start: int) -> Iterator[Tuple[int, int]]:
+        """Yields (end, skill_id) for every surface form starting at `start`."""
+        end = start
+        while end < len(tokens):
+            key = tuple(tokens[start:end + 1])
+            end += 1
+            skill_id = self._terminals.get(key)
+            if skill_id is not None:
+                yield end, skill_id
+            if key not in self._prefixes:
+                break
+
+    def _in_context(self, tokens: List[str], glued: List[bool], segments: List[int],
+                    i: int, covered: Set[int]) -> bool:
+        """Whether the ambiguous one-word form at token `i` is used as a skill."""
+        if glued[i]:
+            return False
+        segment = segments[i]
+
+        def same(j: int) -> bool:
+            return 0 <= j < len(tokens) and segments[j] == segment
+
+        if not same(i - 1) and not same(i + 1):
+            return True
+        if same(i - 1) and tokens[i - 1] in self._context_prefixes:
+            return True
+        for step in (-1, 1):
+            j = i + step
+            if not same(j):
+                continue
+            if tokens[j] in self._context_words or j in covered:
+                return True
+            if tokens[j] in LIST_JOINERS and same(j + step) and j + step in covered:
+                return True
+        return False
+
+    def _matches(self, text: str) -> Tuple[List[str], List[Tuple[int, int, int]]]:
+        """Tokenizes `text` and returns it with every accepted (start, end, skill_id) match."""
+        text = text.lower()
+        tokens, starts = _scan(text)
+        matches, ambiguous = [], []
+        for start in range(len(tokens)):
+            for end, skill_id in self._walk(tokens, start):
+                if end - start == 1 and (tokens[start],) in self._ambiguous:
+                    ambiguous.append((start, end, skill_id))
+                else:
+                    matches.append((start, end, skill_id))
+        if ambiguous:
+            glued, segments = _context(text, tokens, starts)
+            covered = {i for start, end, _ in matches + ambiguous for i in range(start, end)}
+            matches += [m for m in ambiguous if self._in_context(tokens, glued, segments, m[0], covered)]
+        return tokens, matches
+
+    def extract(self, text: str) -> FrozenSet[int]:
+        """Returns the ids of every skill mentioned anywhere in `text`."""
+        return frozenset(skill_id for _, _, skill_id in self._matches(text)[1])
+
+    def canonical_tokens(self, text: str) -> List[str]:
+        """
+        Tokenizes `text` and replaces each longest-matching surface form with
+        its canonical skill name ("JS" -> "javascript", "k8s" -> "kubernetes").
+        """
+        tokens, matches = self._matches(text)
+        longest: Dict[int, Tuple[int, int]] = {}
+        for start, end, skill_id in matches:
+            if end > longest.get(start, (0, 0))[0]:
+                longest[start] = (end, skill_id)
+        out = []
+        i = 0
+        while i < len(tokens):
+            if i in longest:
+                end, skill_id = longest[i]
+                out.append(self.names[skill_id])
+                i = end
+            else:
+                out.append(tokens[i])
+                i += 1
+        return out
+
+
+SKILL_INDEX = SkillIndex(config.SKILL_SYNONYMS, config.AMBIGUOUS_SKILL_FORMS,
+                         config.SKILL_CONTEXT_WORDS, config.SKILL_CONTEXT_PREFIXES)
+
+
+@lru_cache(maxsize=65536)
+def extract_skill_ids(text: str) -> FrozenSet[int]:
+    """Cached `SKILL_INDEX.extract`; job requirements are re-used per candidate."""
+    return SKILL_INDEX.extract(text)
+
+
+@lru_cache(maxsize=65536)
+def phrase_tokens(text: str) -> Tuple[str, ...]:
+    """Cached `tokenize` as a hashable tuple, for whole-phrase lookups."""
+    return tuple(tokenize(text))
+
+
+def contains_phrase(tokens: Tuple[str, ...], phrases: set, lengths: set) -> bool:
+    """True if any contiguous run of `tokens` is one of the token tuples in `phrases`."""
+    for n in lengths:
+        for start in range(len(tokens) - n + 1):
+            if tokens[start:start + n] in phrases:
+                return True
+    return False
@@ -0,0 +1,55 @@
+# Query embedding cache: cache hits must never load the encoder.
+
+import os
+import subprocess
+import sys
+
+import numpy as np
+
+ROOT = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+sys.path.insert(0, ROOT)
+
+from embeddings import EmbeddingCache
+
+
+class CountingEncoder:
+    def __init__(self):
+        self.calls = 0
+
+    def encode(self, texts, convert_to_numpy=True):
+        self.calls += 1
+        return np.ones((len(texts), 4), dtype=np.float32)
+
+
+def test_model_is_loaded_only_on_a_miss(tmp_path):
+    loads = []
+    encoder = CountingEncoder()
+
+    def load():
+        loads.append(1)
+        return encoder
+
+    EmbeddingCache(load, "m", cache_dir=str(tmp_path)).encode(["q1", "q2", "q1"])
+    assert (len(loads), encoder.calls) == (1, 1)
+
+    warm = EmbeddingCache(load, "m", cache_dir=str(tmp_path))
+    assert warm.encode(["q2", "q1"]).shape == (2, 4)
+    assert (len(loads), encoder.calls) == (1, 1)
+
+
+def test_cached_query_does_not_import_sentence_transformers(tmp_path):
+    # Fresh interpreter in a scratch directory, so the default relative cache dir lands there.
+    probe = (
+        "import sys, numpy as np, config\n"
+        "from embeddings import EmbeddingCache\n"
+        "from retrieval import HybridRetriever\n"
+        "class Stub:\n"
+        "    def encode(self, texts, convert_to_numpy=True):\n"
+        "        return np.ones((len(texts), 384), dtype=np.float32)\n"
+        "EmbeddingCache(lambda: Stub(), config.EMBEDDING_MODEL).encode(['python developer'])\n"
+        "HybridRetriever().embed_queries(['python developer'])\n"
+        "print('sentence_transformers' in sys.modules)\n"
+    )
+    out = subprocess.run([sys.executable, "-c", probe], cwd=tmp_path, capture_output=True, text=True,
+                         env={**os.environ, "PYTHONPATH": ROOT}, check=True).stdout.splitlines()
+    assert out[-1] == "False"
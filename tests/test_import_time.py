@@ -0,0 +1,20 @@
+# Guards the lazy-import budget: `import matching_system` must stay fast and
+# must not load any heavy backend. Run with `python -m pytest`.
+
+import os
+import sys
+
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+from benchmark import HEAVY_MODULES, IMPORT_TIME_BUDGET_SECONDS, import_probe
+
+
+def test_import_loads_no_heavy_modules():
+    _, eager = import_probe("matching_system")
+    assert eager == [], f"importing matching_system eagerly loaded {eager} (checked: {HEAVY_MODULES})"
+
+
+def test_import_within_budget():
+    # Best of three, so one slow cold start on a busy machine does not fail the run.
+    best = min(import_probe("matching_system")[0] for _ in range(3))
+    assert best < IMPORT_TIME_BUDGET_SECONDS, f"import matching_system took {best:.2f} s"
@@ -0,0 +1,71 @@
+# Job queue checkpointing: interrupted drains release their claims and a
+# later drain finishes the stage. Run with `python -m pytest`.
+
+import os
+import signal
+import sys
+import threading
+import time
+
+import pytest
+
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+from job_queue import JobQueue
+
+
+@pytest.fixture
+def queue(tmp_path):
+    return JobQueue(str(tmp_path / "queue.sqlite3"))
+
+
+def slow_handler(item_id, payload):
+    time.sleep(1.0)
+    return item_id.upper()
+
+
+@pytest.mark.skipif(not hasattr(signal, "SIGALRM"), reason="needs POSIX signals")
+def test_sigint_stops_drain_and_releases_claims(queue):
+    queue.enqueue("run", "parse", [(f"item{i}", None) for i in range(6)])
+    timer = threading.Timer(1.5, os.kill, (os.getpid(), signal.SIGINT))
+    timer.start()
+    start = time.perf_counter()
+    with pytest.raises(KeyboardInterrupt):
+        queue.drain("run", "parse", slow_handler, workers=2)
+    interrupted_after = time.perf_counter() - start
+    timer.join()
+
+    assert interrupted_after < 2.0
+    counts = queue.counts("run", "parse")
+    assert counts.get("running", 0) == 0
+    assert counts.get("done", 0) < 6
+
+    # The released items are claimable right away, well before the lease expires.
+    start = time.perf_counter()
+    queue.drain("run", "parse", slow_handler, workers=6)
+    assert time.perf_counter() - start < queue.lease_seconds
+    assert queue.counts("run", "parse") == {"done": 6}
+    assert queue.results("run", "parse") == {f"item{i}": f"ITEM{i}" for i in range(6)}
+
+
+def test_failed_items_are_retried_on_next_drain(queue):
+    queue.enqueue("run", "parse", [("item", None)])
+
+    def outage(item_id, payload):
+        raise ConnectionError("LLM outage")
+
+    queue.drain("run", "parse", outage)
+    assert queue.counts("run", "parse") == {"failed": 1}
+    queue.drain("run", "parse", lambda item_id, payload: "ok")
+    assert queue.results("run", "parse") == {"item": "ok"}
+
+
+def test_stale_completion_does_not_overwrite_new_claim(queue):
+    queue.enqueue("run", "parse", [("item", None)])
+    queue.claim("run", "parse", "a-0")
+    queue.release("run", "parse", "a")
+    queue.claim("run", "parse", "b-0")
+    queue.complete("run", "parse", "item", "stale", worker="a-0")
+    assert queue.counts("run", "parse") == {"running": 1}
+    queue.complete("run", "parse", "item", "fresh", worker="b-0")
+    assert queue.results("run", "parse") == {"item": "fresh"}
@@ -0,0 +1,49 @@
+# On-disk dense index used by streaming ingestion: results must match an
+# in-memory exact search however the rows are split into blocks.
+
+import os
+import sys
+
+import numpy as np
+import pytest
+
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+from retrieval import DiskVectorIndex
+
+
+def exact_top_k(vectors, queries, k):
+    vectors = vectors / np.linalg.norm(vectors, axis=1, keepdims=True)
+    queries = queries / np.linalg.norm(queries, axis=1, keepdims=True)
+    return np.argsort(-(queries @ vectors.T), axis=1, kind="stable")[:, :k]
+
+
+@pytest.mark.parametrize("block_rows", [7, 64, 10_000])
+def test_top_k_matches_exact_search(tmp_path, block_rows):
+    rng = np.random.default_rng(0)
+    vectors = rng.standard_normal((300, 16)).astype(np.float32)
+    queries = rng.standard_normal((4, 16)).astype(np.float32)
+    ids = [f"doc{i}" for i in range(300)]
+
+    index = DiskVectorIndex(str(tmp_path), block_rows=block_rows)
+    for start in range(0, 300, 64):  # appended in chunks, like streaming ingestion
+        index.add(ids[start:start + 64], {"summary": vectors[start:start + 64]})
+
+    expected = [[ids[i] for i in row] for row in exact_top_k(vectors, queries, 10)]
+    assert index.top_k("summary", queries, 10) == expected
+
+
+def test_add_overwrites_existing_ids(tmp_path):
+    index = DiskVectorIndex(str(tmp_path))
+    index.add(["a", "b"], {"summary": np.array([[1, 0], [0, 1]], dtype=np.float32)})
+    assert index.top_k("summary", [[1, 0]], 5) == [["a", "b"]]
+    index.add(["a"], {"summary": np.array([[-1, 0]], dtype=np.float32)})
+    assert index.top_k("summary", [[1, 0]], 5) == [["b", "a"]]
+
+
+def test_clear_and_empty(tmp_path):
+    index = DiskVectorIndex(str(tmp_path))
+    assert index.top_k("summary", [[1.0, 0.0]], 3) == [[]]
+    index.add(["a"], {"summary": np.array([[1, 0]], dtype=np.float32)})
+    index.clear()
+    assert index.top_k("summary", [[1.0, 0.0]], 3) == [[]]
@@ -0,0 +1,94 @@
+# Skill normalization: surface forms map to canonical ids, and ambiguous
+# one-word forms only count as skills in context. Run with `python -m pytest`.
+
+import os
+import sys
+
+import pytest
+
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+import skills
+from scoring import ScoringEngine
+
+
+def names(text):
+    return {skills.SKILL_INDEX.name(i) for i in skills.SKILL_INDEX.extract(text)}
+
+
+@pytest.mark.parametrize("text, expected", [
+    ("JS", {"javascript"}),
+    ("JavaScript", {"javascript"}),
+    ("ES6", {"javascript"}),
+    ("k8s", {"kubernetes"}),
+    ("Kubernetes", {"kubernetes"}),
+    ("C++", {"cpp"}),
+    ("C#", {"csharp"}),
+    (".NET", {"dotnet"}),
+    ("Node.js", {"nodejs"}),
+    ("golang", {"go"}),
+    ("Python-based services", {"python"}),
+    ("front-end", {"frontend"}),
+    ("AWS S3", {"aws", "aws_s3"}),
+    ("R programming", {"r"}),
+])
+def test_surface_forms_map_to_canonical_ids(text, expected):
+    assert names(text) == expected
+
+
+def test_cpp_and_csharp_stay_distinct():
+    assert names("C++") != names("C#")
+    assert skills.SKILL_INDEX.canonical_tokens("C++ and C#") == ["cpp", "and", "csharp"]
+
+
+@pytest.mark.parametrize("text", [
+    "good",
+    "R&D experience",
+    "C-suite",
+    "Go-to-market strategy",
+    "Ability to go the extra mile",
+    "Node in a graph",
+    "swift delivery",
+    "spark joy",
+])
+def test_everyday_words_are_not_skills(text):
+    assert names(text) == set()
+
+
+@pytest.mark.parametrize("text, expected", [
+    ("Go", {"go"}),
+    ("C", {"c"}),
+    ("Experience with Go", {"go"}),
+    ("Go developer", {"go"}),
+    ("C/C++", {"c", "cpp"}),
+    ("Python, Go and Rust", {"python", "go", "rust"}),
+    ("Languages: Go, C", {"go", "c"}),
+    ("Apache Spark", {"spark"}),
+])
+def test_ambiguous_forms_match_in_context(text, expected):
+    assert names(text) == expected
+
+
+def test_canonical_tokens_fold_synonyms():
+    assert skills.SKILL_INDEX.canonical_tokens("JS and k8s on AWS") == ["javascript", "and", "kubernetes", "on", "aws"]
+
+
+@pytest.fixture(scope="module")
+def scorer():
+    return ScoringEngine()
+
+
+@pytest.mark.parametrize("required, candidate, expected", [
+    (["JavaScript"], ["JS"], 100.0),
+    (["Kubernetes"], ["k8s"], 100.0),
+    (["Go"], ["good communication"], 0.0),
+    (["C#"], ["C++"], 0.0),
+    (["Ability to go the extra mile"], ["Go"], 0.0),
+    (["C-suite stakeholder management"], ["C"], 0.0),
+    (["Go-to-market experience"], ["Go"], 0.0),
+    (["R&D experience"], ["R"], 0.0),
+    (["Python", "Go"], ["Python"], 50.0),
+    (["B.S. in Computer Science"], ["B.S. in Computer Science"], 100.0),
+])
+def test_score_skills(scorer, required, candidate, expected):
+    assert scorer._score_skills(required, candidate) == expected
@@ -1,9 +1,11 @@
 
-import pdfplumber
-import docx
+import hashlib
 import os
-import re
-from typing import List, Union
+import skills
+from itertools import islice
+from typing import Iterable, Iterator, List, Union
+
+SUPPORTED_EXTENSIONS = ('.pdf', '.docx', '.txt')
 
 def extract_text(file_path: str) -> Union[str, None]:
     """Extracts text from PDF, DOCX, or TXT."""
@@ -11,10 +13,13 @@ def extract_text(file_path: str) -> Union[str, None]:
     _, extension = os.path.splitext(file_path)
     
     try:
+        # Extractor libraries are heavy; import them only when a file needs them.
         if extension == '.pdf':
+            import pdfplumber
             with pdfplumber.open(file_path) as pdf:
                 return "\n".join(page.extract_text() for page in pdf.pages)
         elif extension == '.docx':
+            import docx
             doc = docx.Document(file_path)
             return "\n".join(para.text for para in doc.paragraphs)
         elif extension == '.txt':
@@ -27,9 +32,33 @@ def extract_text(file_path: str) -> Union[str, None]:
         print(f"Error reading {file_path}: {e}")
         return None
 
-def simple_tokenizer(text: str) -> List[str]:
-    """A simple tokenizer for BM25."""
-    text = re.sub(r'[^\w\s]', '', text).lower()
-    return text.split()
+def iter_resume_files(directory: str) -> Iterator[str]:
+    """Lazily yields every supported resume file in `directory`."""
+    with os.scandir(directory) as entries:
+        for entry in entries:
+            if entry.is_file() and os.path.splitext(entry.name)[1] in SUPPORTED_EXTENSIONS:
+                yield entry.path
+
+def file_digest(file_path: str) -> str:
+    """Content hash of a file, so a re-uploaded copy (new name, same bytes) is recognized."""
+    digest = hashlib.sha256()
+    with open(file_path, 'rb') as f:
+        for block in iter(lambda: f.read(1 << 20), b''):
+            digest.update(block)
+    return digest.hexdigest()
 
-print("File 'utils.py' created.")
+def chunked(iterable: Iterable, size: int) -> Iterator[list]:
+    """Splits an iterable into lists of at most `size` items without materializing it."""
+    iterator = iter(iterable)
+    while True:
+        chunk = list(islice(iterator, size))
+        if not chunk:
+            return
+        yield chunk
+
+def simple_tokenizer(text: str) -> List[str]:
+    """
+    Tokenizer for BM25. Keeps symbols that carry meaning in skill names
+    ("C++", "C#") and folds known synonyms onto canonical skill names.
+    """
+    return skills.SKILL_INDEX.canonical_tokens(text)